@@ -1,11 +1,12 @@
 import argparse
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from fifi.enums import Market
 from fifi.enums.market import MarketStat
-from fifi import MarketStatRepository, MarketDataRepository, LoggerFactory
+from fifi import MarketStatRepository, LoggerFactory
 from fifi.types.market import intervals_type
 
 from src.common.settings import Settings
+from src.repository.shm.market_data_repository import MarketDataRepository
 
 
 settings = Settings()
@@ -35,6 +36,21 @@ def get_market_last_stat(repo: MarketStatRepository) -> List[float]:
     return [rsi, atr, hma]
 
 
+def open_repos(
+    market: Market, interval: intervals_type
+) -> Tuple[MarketStatRepository, MarketDataRepository]:
+    """readers with the depth and layout the writers created the segments with"""
+    rows = settings.get_history_depth(interval)
+    stat_repo = MarketStatRepository(market=market, interval=interval, rows=rows)
+    data_repo = MarketDataRepository(
+        market=market,
+        interval=interval,
+        rows=rows,
+        compact=settings.COMPACT_STORAGE,
+    )
+    return stat_repo, data_repo
+
+
 def read_shm(
     market: Optional[Market],
     stat: Optional[MarketStat],
@@ -52,11 +68,8 @@ def read_shm(
                 stat_repos[market] = dict()
             if market not in data_repos:
                 data_repos[market] = dict()
-            stat_repos[market][interv] = MarketStatRepository(
-                interval=interv, market=market
-            )
-            data_repos[market][interv] = MarketDataRepository(
-                interval=interv, market=market
+            stat_repos[market][interv], data_repos[market][interv] = open_repos(
+                market, interv
             )
         else:
             for mark in settings.MARKETS:
@@ -64,11 +77,8 @@ def read_shm(
                     stat_repos[mark] = dict()
                 if mark not in data_repos:
                     data_repos[mark] = dict()
-                stat_repos[mark][interv] = MarketStatRepository(
-                    interval=interv, market=mark
-                )
-                data_repos[mark][interv] = MarketDataRepository(
-                    interval=interv, market=mark
+                stat_repos[mark][interv], data_repos[mark][interv] = open_repos(
+                    mark, interv
                 )
 
     if stat:
@@ -1,3 +1,35 @@
-__all__ = ["Settings"]
+__all__ = [
+    "Settings",
+    "ExtraStat",
+    "CrossStat",
+    "MarketStatHistoryRepository",
+    "CrossMarketStatRepository",
+    "CandleFlow",
+    "CandleFlowRepository",
+    "MarketDataRepository",
+    "CandleRevisionRepository",
+    "CandleArchive",
+    "AlertEvent",
+    "AlertEventRepository",
+    "HandoffStat",
+    "HandoffStatsRepository",
+    "parse_alert_rules",
+]
 
 from .common.settings import Settings
+from .enums.extra_stat import ExtraStat
+from .enums.cross_stat import CrossStat
+from .enums.candle_flow import CandleFlow
+from .enums.alert_event import AlertEvent
+from .repository.shm.market_stat_history_repository import (
+    MarketStatHistoryRepository,
+)
+from .repository.shm.cross_market_stat_repository import CrossMarketStatRepository
+from .repository.shm.candle_flow_repository import CandleFlowRepository
+from .repository.shm.market_data_repository import MarketDataRepository
+from .repository.shm.candle_revision_repository import CandleRevisionRepository
+from .repository.archive.candle_archive import CandleArchive
+from .repository.shm.alert_event_repository import AlertEventRepository
+from .enums.handoff_stat import HandoffStat
+from .repository.shm.handoff_stats_repository import HandoffStatsRepository
+from .engines.indicators.alerts import parse_alert_rules
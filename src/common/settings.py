@@ -1,8 +1,8 @@
-from typing import Annotated, List, Literal
+from typing import Annotated, Dict, List, Literal
 from dotenv import load_dotenv
 from fifi.types.market import intervals_type
 from pydantic_settings import BaseSettings, NoDecode
-from pydantic import field_validator
+from pydantic import Field, field_validator
 from fifi.enums import Exchange, Market
 
 
@@ -40,6 +40,159 @@ class Settings(BaseSettings):
     def decode_intervals(cls, v: str) -> list[str]:
         return [x for x in v.split(",")]
 
+    # indicators of the registry computed for every interval, overridden per interval
+    # by INDICATORS, e.g. "1m:RSI14,ATR14;1h:RSI14,ATR14,HMA,MACD"
+    DEFAULT_INDICATORS: Annotated[List[str], NoDecode] = [
+        "RSI14",
+        "ATR14",
+        "ATR5",
+        "ATR3",
+        "HMA",
+    ]
+
+    @field_validator("DEFAULT_INDICATORS", mode="before")
+    @classmethod
+    def decode_default_indicators(cls, v: str) -> list[str]:
+        if not isinstance(v, str):
+            # the default when unset, defaults are validated too
+            return v
+        return [x for x in v.split(",")]
+
+    INDICATORS: Annotated[Dict[str, List[str]], NoDecode] = dict()
+
+    @field_validator("INDICATORS", mode="before")
+    @classmethod
+    def decode_indicators(cls, v: str) -> dict[str, list[str]]:
+        if not isinstance(v, str):
+            return v
+        indicators = dict()
+        for item in v.split(";"):
+            if not item:
+                continue
+            interval, names = item.split(":")
+            indicators[interval] = [x for x in names.split(",") if x]
+        return indicators
+
+    def get_indicators(self, interval: intervals_type) -> List[str]:
+        return self.INDICATORS.get(interval, self.DEFAULT_INDICATORS)
+
+    # candles kept in shm for every interval, overridden per interval by
+    # HISTORY_DEPTH, e.g. "1m:1440;1w:52"
+    DEFAULT_HISTORY_DEPTH: int = 200
+    HISTORY_DEPTH: Annotated[Dict[str, int], NoDecode] = dict()
+
+    @field_validator("HISTORY_DEPTH", mode="before")
+    @classmethod
+    def decode_history_depth(cls, v: str) -> dict[str, int]:
+        if not isinstance(v, str):
+            return v
+        depths = dict()
+        for item in v.split(";"):
+            if not item:
+                continue
+            interval, depth = item.split(":")
+            depths[interval] = int(depth)
+        return depths
+
+    def get_history_depth(self, interval: intervals_type) -> int:
+        return self.HISTORY_DEPTH.get(interval, self.DEFAULT_HISTORY_DEPTH)
+
+    # count and profile columns stored as float32, every process must agree on it
+    COMPACT_STORAGE: bool = False
+
+    # alert rules evaluated after every stat update, name=interval:LEFT>RIGHT, e.g.
+    # "overbought=1m:RSI14>70,hma_cross=1h:CLOSE>HMA,atr_spike=1m:ATR3>1.5*ATR14"
+    ALERT_RULES: Annotated[List[str], NoDecode] = list()
+
+    @field_validator("ALERT_RULES", mode="before")
+    @classmethod
+    def decode_alert_rules(cls, v: str) -> list[str]:
+        if not isinstance(v, str):
+            return v
+        return [x for x in v.split(",") if x]
+
+    # events kept in the alert ring of every market
+    ALERT_EVENT_CAPACITY: int = 1024
+
+    # MARKETS and INTERVALS are re-read from CONFIG_FILE when it changes
+    CONFIG_FILE: str = ".env"
+    CONFIG_WATCH_INTERVAL: float = 5
+
+    # a new instance takes over the live segments of the running one instead of
+    # recreating and backfilling them; HANDOVER_TIMEOUT without heartbeat = gone
+    HANDOVER_ENABLED: bool = False
+    HANDOVER_TIMEOUT: float = 10
+
+    # the interpreter closes the candles at their boundary, opening a flat one if
+    # no trade arrived; trades of a closed candle are accepted for GRACE seconds
+    CANDLE_ROLLOVER: bool = True
+    CANDLE_ROLLOVER_GRACE: float = 0.2
+
     RESET_TIME_THRESHOLD: float = 20
     HARD_RESET_TIME_THRESHOLD: float = 30
+    HEARTBEAT_INTERVAL: float = 0.5
+    HEARTBEAT_TIMEOUT: float = 2
+    # recent trade ids kept to drop the trades replayed on reconnect
+    TRADE_DEDUPE_CAPACITY: int = 16384
+    # trade batches buffered between the websocket and the interpreter
+    HANDOFF_CAPACITY: int = 4096
+    HANDOFF_OVERFLOW_POLICY: Literal["block", "drop_oldest", "coalesce"] = "coalesce"
+    # seconds between two hand-off buffer metrics log lines
+    HANDOFF_REPORT_INTERVAL: float = 60
     LOG_LEVEL: str = "INFO"
+    # volume-at-price profile of the forming candle, bins of BPS of the open,
+    # widened by sqrt(interval minutes) for the longer intervals
+    VOLUME_PROFILE_BINS: int = 24
+    VOLUME_PROFILE_BIN_BPS: float = 5
+    # trades of at least this notional are counted as large in the candle flow
+    LARGE_TRADE_NOTIONAL: float = 100_000
+
+    # cross market correlation/beta engine
+    CROSS_MARKET_ENABLED: bool = False
+    # candles, the forming one included; at least 2 for a return
+    CROSS_MARKET_WINDOW: int = Field(default=50, gt=1)
+    CROSS_MARKET_UPDATE_INTERVAL: float = 0.5
+
+    # columnar archive of the closed candles, written in batches of
+    # ARCHIVE_BATCH_SIZE candles or every ARCHIVE_FLUSH_INTERVAL seconds
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_DIR: str = "./archive"
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_FLUSH_INTERVAL: float = 300
+    ARCHIVE_POLL_INTERVAL: float = 5
+    # parts of a month merged into one beyond this count
+    ARCHIVE_COMPACT_FILES: int = 32
+
+    # on demand profiling: SIGUSR1 or the control file toggle it
+    PROFILE_DIR: str = "./logs"
+    PROFILE_CONTROL_FILE: str = "./.tmp/profile"
+    PROFILE_SAMPLE_INTERVAL: float = 0.005
+
+    # remote gateway (REST snapshots + websocket push streams)
+    GATEWAY_ENABLED: bool = False
+    GATEWAY_HOST: str = "0.0.0.0"
+    GATEWAY_PORT: int = 8000
+    GATEWAY_POLL_INTERVAL: float = 0.1
+    GATEWAY_CLIENT_QUEUE_SIZE: int = 256
+
+
+def reload_settings(config_file: str) -> Settings:
+    """settings with `config_file` applied over the environment of the process"""
+    load_dotenv(config_file, override=True)
+    return Settings()
+
+
+def adopt_intervals(
+    settings: Settings, intervals: List[intervals_type], config_file: str
+) -> None:
+    """
+    switch a running engine to `intervals`; only the per interval settings of
+    the added intervals are read from `config_file`, the others keep the values
+    the engine started with
+    """
+    reloaded = reload_settings(config_file)
+    for interval in intervals:
+        if interval not in settings.INTERVALS:
+            settings.HISTORY_DEPTH[interval] = reloaded.get_history_depth(interval)
+            settings.INDICATORS[interval] = reloaded.get_indicators(interval)
+    settings.INTERVALS = list(intervals)
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fifi import BaseEngine, log_exception, LoggerFactory
+from fifi.enums import Market
+from fifi.enums.market import MarketData, MarketStat
+from fifi.types.market import intervals_type
+
+from ...common.settings import Settings
+from ...enums.extra_stat import ExtraStat
+from ...repository.archive.candle_archive import CandleArchive
+from ...repository.shm.candle_flow_repository import CandleFlowRepository
+from ...repository.shm.market_data_repository import MarketDataRepository
+from ...repository.shm.market_stat_history_repository import (
+    MarketStatHistoryRepository,
+)
+from ...utils.profiler import start_profiler
+
+
+LOGGER = LoggerFactory().get(__name__)
+
+CONNECT_RETRY_DELAY = 5
+
+CANDLE_FIELDS = [field for field in MarketData if field != MarketData.PRICE]
+STATS = [stat for stat in MarketStat if stat != MarketStat.TIME] + list(ExtraStat)
+
+
+def align(source_times: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """row of every time in `source_times`, -1 where it has none"""
+    rows = np.minimum(np.searchsorted(source_times, times), len(source_times) - 1)
+    return np.where(source_times[rows] == times, rows, -1)
+
+
+def take(values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    return np.where(rows >= 0, values[rows], np.nan)
+
+
+source_type = Tuple[
+    MarketDataRepository, MarketStatHistoryRepository, CandleFlowRepository
+]
+
+
+class ArchiverEngine(BaseEngine):
+    """
+    Appends the closed candles of every market and interval, with their final
+    stats and trade flow, to the columnar `CandleArchive`.
+    Candles are collected every poll and written in batches, so the archive
+    only grows by a few parts a day on the short intervals.
+    """
+
+    name: str
+    _sources: Dict[Tuple[Market, intervals_type], source_type]
+    _last_times: Dict[Tuple[Market, intervals_type], float]
+    _pending: Dict[Tuple[Market, intervals_type], List[pd.DataFrame]]
+
+    def __init__(self, run_in_process: bool = True):
+        super().__init__(run_in_process)
+        self.name = "ArchiverEngine"
+        self.settings = Settings()
+        self.archive = CandleArchive(
+            directory=self.settings.ARCHIVE_DIR,
+            compact_files=self.settings.ARCHIVE_COMPACT_FILES,
+        )
+        self._sources = dict()
+        self._last_times = dict()
+        self._pending = dict()
+        self._flushed_at = time.monotonic()
+
+    @log_exception()
+    async def prepare(self) -> None:
+        self.profiler = start_profiler(self.name)
+        for market in self.settings.MARKETS:
+            for interval in self.settings.INTERVALS:
+                key = (market, interval)
+                while True:
+                    try:
+                        self._sources[key] = self.connect(market, interval)
+                        break
+                    except FileNotFoundError:
+                        LOGGER.warning(
+                            f"{market.value}-{interval} shm is not ready, retry in {CONNECT_RETRY_DELAY}s..."
+                        )
+                        await asyncio.sleep(CONNECT_RETRY_DELAY)
+                self._last_times[key] = self.archive.last_time(market, interval)
+                self._pending[key] = list()
+
+    def connect(self, market: Market, interval: intervals_type) -> source_type:
+        depth = self.settings.get_history_depth(interval)
+        return (
+            MarketDataRepository(
+                market=market,
+                interval=interval,
+                rows=depth,
+                compact=self.settings.COMPACT_STORAGE,
+            ),
+            MarketStatHistoryRepository(market=market, interval=interval, rows=depth),
+            CandleFlowRepository(
+                market=market,
+                interval=interval,
+                bins=self.settings.VOLUME_PROFILE_BINS,
+                rows=depth,
+                compact=self.settings.COMPACT_STORAGE,
+            ),
+        )
+
+    @log_exception()
+    async def execute(self) -> None:
+        LOGGER.info(
+            f"{self.name} is archiving {len(self._sources)} market intervals to {self.settings.ARCHIVE_DIR}..."
+        )
+        while True:
+            for key in self._sources:
+                frame = self.collect(key)
+                if frame is not None:
+                    self._pending[key].append(frame)
+                    self._last_times[key] = frame["time"].iloc[-1]
+            pending = sum(
+                len(frame) for frames in self._pending.values() for frame in frames
+            )
+            if (
+                pending >= self.settings.ARCHIVE_BATCH_SIZE
+                or time.monotonic() - self._flushed_at
+                >= self.settings.ARCHIVE_FLUSH_INTERVAL
+            ):
+                await asyncio.to_thread(self.flush)
+            await asyncio.sleep(self.settings.ARCHIVE_POLL_INTERVAL)
+
+    def collect(self, key: Tuple[Market, intervals_type]) -> Optional[pd.DataFrame]:
+        """closed candles newer than the archived ones, None if there is none"""
+        data, history, flow = self._sources[key]
+        # a candle is final once the stats moved on to the next one too
+        live_time = min(data.get_time(), history.get_time())
+        candles = np.array(data.extract_data())
+        times = candles[:, MarketData.TIME.value]
+        rows = np.flatnonzero((times > self._last_times[key]) & (times < live_time))
+        if not len(rows):
+            return None
+        frame = {"time": times[rows].astype(np.int64)}
+        for field in CANDLE_FIELDS:
+            if field != MarketData.TIME:
+                frame[field.name.lower()] = candles[rows, field.value]
+        stat_rows = align(history.get_times(), times[rows])
+        for stat in STATS:
+            frame[stat.name.lower()] = take(history.get_stat(stat), stat_rows)
+        flow_rows = align(flow.get_times(), times[rows])
+        frame["vwap"] = take(flow.get_vwaps(), flow_rows)
+        frame["trades"] = take(flow.get_trade_counts(), flow_rows)
+        frame["realized_vol"] = take(flow.get_realized_vols(), flow_rows)
+        frame["imbalance"] = take(flow.get_imbalances(), flow_rows)
+        frame["large_buys"] = take(flow.get_large_buys(), flow_rows)
+        frame["large_sells"] = take(flow.get_large_sells(), flow_rows)
+        # the writer shifted meanwhile, the next poll copies a consistent view
+        if not np.array_equal(data.get_times()[rows], times[rows]):
+            return None
+        return pd.DataFrame(frame)
+
+    def flush(self) -> None:
+        for (market, interval), frames in self._pending.items():
+            if not frames:
+                continue
+            self.archive.append(market, interval, pd.concat(frames, ignore_index=True))
+            frames.clear()
+        self._flushed_at = time.monotonic()
+
+    async def postpare(self) -> None:
+        self.profiler.stop()
+        self.flush()
+        for sources in self._sources.values():
+            for repo in sources:
+                repo.close()
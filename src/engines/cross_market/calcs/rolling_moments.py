@@ -0,0 +1,130 @@
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _add_row(
+    sums_r: np.ndarray,
+    sums_rr: np.ndarray,
+    sums_l: np.ndarray,
+    sums_ll: np.ndarray,
+    r: np.ndarray,
+    l: np.ndarray,
+    sign: float,
+) -> None:
+    m = r.shape[0]
+    for i in range(m):
+        sums_r[i] += sign * r[i]
+        sums_l[i] += sign * l[i]
+        for j in range(m):
+            sums_rr[i, j] += sign * r[i] * r[j]
+            sums_ll[i, j] += sign * l[i] * l[j]
+
+
+@njit(cache=True)
+def _push_row(
+    ring_r: np.ndarray,
+    ring_l: np.ndarray,
+    state: np.ndarray,
+    sums_r: np.ndarray,
+    sums_rr: np.ndarray,
+    sums_l: np.ndarray,
+    sums_ll: np.ndarray,
+    r: np.ndarray,
+    l: np.ndarray,
+) -> None:
+    """
+    push the returns and log prices of a closed candle into the window,
+    updating the moment sums in O(markets^2) instead of recomputing them
+    """
+    head = state[0]
+    if state[1] == ring_r.shape[0]:
+        _add_row(sums_r, sums_rr, sums_l, sums_ll, ring_r[head], ring_l[head], -1.0)
+    else:
+        state[1] += 1
+    ring_r[head] = r
+    ring_l[head] = l
+    _add_row(sums_r, sums_rr, sums_l, sums_ll, r, l, 1.0)
+    state[0] = (head + 1) % ring_r.shape[0]
+
+
+@njit(cache=True)
+def _rebuild_sums(
+    ring_r: np.ndarray,
+    ring_l: np.ndarray,
+    state: np.ndarray,
+    sums_r: np.ndarray,
+    sums_rr: np.ndarray,
+    sums_l: np.ndarray,
+    sums_ll: np.ndarray,
+) -> None:
+    """recompute the sums from the window, bounds the drift of the rolling updates"""
+    sums_r[:] = 0.0
+    sums_rr[:] = 0.0
+    sums_l[:] = 0.0
+    sums_ll[:] = 0.0
+    for k in range(state[1]):
+        _add_row(sums_r, sums_rr, sums_l, sums_ll, ring_r[k], ring_l[k], 1.0)
+
+
+@njit(cache=True)
+def _cross_stats(
+    sums_r: np.ndarray,
+    sums_rr: np.ndarray,
+    sums_l: np.ndarray,
+    sums_ll: np.ndarray,
+    closed: int,
+    r_live: np.ndarray,
+    l_live: np.ndarray,
+    out: np.ndarray,
+) -> None:
+    """
+    correlation, covariance, beta and spread z-score matrices over the closed
+    window plus the forming candle, written into `out` (4, markets, markets)
+    """
+    m = r_live.shape[0]
+    n = closed + 1
+    out[:] = np.nan
+    if n < 3:
+        return
+    mean_r = (sums_r + r_live) / n
+    mean_l = (sums_l + l_live) / n
+    for i in range(m):
+        for j in range(m):
+            e_rr = (sums_rr[i, j] + r_live[i] * r_live[j]) / n
+            out[1, i, j] = (e_rr - mean_r[i] * mean_r[j]) * n / (n - 1)
+    for i in range(m):
+        for j in range(m):
+            var_i = out[1, i, i]
+            var_j = out[1, j, j]
+            if var_i > 0 and var_j > 0:
+                out[0, i, j] = out[1, i, j] / np.sqrt(var_i * var_j)
+            if var_j > 0:
+                out[2, i, j] = out[1, i, j] / var_j
+            if i == j:
+                continue
+            spread = l_live[i] - l_live[j]
+            mean_s = mean_l[i] - mean_l[j]
+            e_ss = (
+                sums_ll[i, i] - 2 * sums_ll[i, j] + sums_ll[j, j] + spread * spread
+            ) / n
+            var_s = (e_ss - mean_s * mean_s) * n / (n - 1)
+            if var_s > 0:
+                out[3, i, j] = (spread - mean_s) / np.sqrt(var_s)
+
+
+def warmup_cross_kernels() -> None:
+    markets = 2
+    window = 4
+    ring_r = np.zeros((window, markets))
+    ring_l = np.zeros((window, markets))
+    state = np.zeros(2, dtype=np.int64)
+    sums_r = np.zeros(markets)
+    sums_rr = np.zeros((markets, markets))
+    sums_l = np.zeros(markets)
+    sums_ll = np.zeros((markets, markets))
+    row = np.ones(markets)
+    out = np.empty((4, markets, markets))
+    _push_row(ring_r, ring_l, state, sums_r, sums_rr, sums_l, sums_ll, row, row)
+    _rebuild_sums(ring_r, ring_l, state, sums_r, sums_rr, sums_l, sums_ll)
+    _cross_stats(sums_r, sums_rr, sums_l, sums_ll, 1, row, row, out)
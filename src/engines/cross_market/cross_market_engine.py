@@ -0,0 +1,259 @@
+import asyncio
+from typing import Dict, List, Optional
+
+import numpy as np
+from fifi import BaseEngine, log_exception, LoggerFactory
+from fifi.enums import Market
+from fifi.types.market import intervals_type
+
+from ...common.settings import Settings
+from ...enums.cross_stat import CrossStat
+from ...helpers.intervals_helpers import to_time
+from ...repository.shm.cross_market_stat_repository import (
+    CrossMarketStatRepository,
+)
+from ...repository.shm.handover_repository import (
+    HandoverRepository,
+    attach_as_writer,
+    detach,
+    layout_fingerprint,
+)
+from ...repository.shm.market_data_repository import MarketDataRepository
+from ...utils.handover import claim
+from ...utils.profiler import start_profiler
+from .calcs.rolling_moments import (
+    _cross_stats,
+    _push_row,
+    _rebuild_sums,
+    warmup_cross_kernels,
+)
+
+
+LOGGER = LoggerFactory().get(__name__)
+
+
+class RollingWindow:
+    """rolling moment sums of the closed candles of all markets of one interval"""
+
+    def __init__(self, markets: int, window: int):
+        # the forming candle completes the window
+        self.ring_r = np.zeros((window - 1, markets))
+        self.ring_l = np.zeros((window - 1, markets))
+        # [ring head, count]
+        self.state = np.zeros(2, dtype=np.int64)
+        self.sums_r = np.zeros(markets)
+        self.sums_rr = np.zeros((markets, markets))
+        self.sums_l = np.zeros(markets)
+        self.sums_ll = np.zeros((markets, markets))
+        self.last_closed_l = np.full(markets, np.nan)
+        self.live_time = 0.0
+        self.pushes = 0
+
+    def clear(self) -> None:
+        self.state[:] = 0
+        self.sums_r[:] = 0
+        self.sums_rr[:] = 0
+        self.sums_l[:] = 0
+        self.sums_ll[:] = 0
+        self.last_closed_l = np.full(self.ring_r.shape[1], np.nan)
+        self.pushes = 0
+
+    def push(self, l: np.ndarray) -> None:
+        r = l - self.last_closed_l
+        self.last_closed_l = l
+        if np.isnan(r).any():
+            return
+        _push_row(
+            self.ring_r,
+            self.ring_l,
+            self.state,
+            self.sums_r,
+            self.sums_rr,
+            self.sums_l,
+            self.sums_ll,
+            r,
+            l,
+        )
+        self.pushes += 1
+        if self.pushes % self.ring_r.shape[0] == 0:
+            _rebuild_sums(
+                self.ring_r,
+                self.ring_l,
+                self.state,
+                self.sums_r,
+                self.sums_rr,
+                self.sums_l,
+                self.sums_ll,
+            )
+
+    def stats(self, l_live: np.ndarray, out: np.ndarray) -> None:
+        _cross_stats(
+            self.sums_r,
+            self.sums_rr,
+            self.sums_l,
+            self.sums_ll,
+            int(self.state[1]),
+            l_live - self.last_closed_l,
+            l_live,
+            out,
+        )
+
+
+class CrossMarketEngine(BaseEngine):
+    """
+    Rolling correlation, covariance, beta and spread z-score between all the
+    configured markets, per interval. The closed candles update rolling
+    moment sums incrementally, every tick only combines them with the forming
+    candle, so the O(markets^2) work is done once for all consumers.
+    """
+
+    name: str
+    markets: List[Market]
+    _data_repos: Dict[intervals_type, List[MarketDataRepository]]
+    _repos: Dict[intervals_type, CrossMarketStatRepository]
+    _windows: Dict[intervals_type, RollingWindow]
+
+    def __init__(self, run_in_process: bool = True):
+        super().__init__(run_in_process)
+        self.name = "CrossMarketEngine"
+        self.settings = Settings()
+        self.markets = self.settings.MARKETS
+        self._data_repos = dict()
+        self._repos = dict()
+        self._windows = dict()
+        self._out = np.empty(
+            (CrossStat.__len__(), len(self.markets), len(self.markets))
+        )
+        self._handover: Optional[HandoverRepository] = None
+        self.released = False
+
+    @log_exception()
+    async def prepare(self) -> None:
+        self.profiler = start_profiler(self.name)
+        warmup_cross_kernels()
+        for interval in self.settings.INTERVALS:
+            self._data_repos[interval] = [
+                MarketDataRepository(
+                    market=market,
+                    interval=interval,
+                    rows=self.settings.get_history_depth(interval),
+                    compact=self.settings.COMPACT_STORAGE,
+                )
+                for market in self.markets
+            ]
+            self._windows[interval] = RollingWindow(
+                markets=len(self.markets), window=self.settings.CROSS_MARKET_WINDOW
+            )
+        if self.settings.HANDOVER_ENABLED:
+            self._handover, takeover, _ = await claim(
+                name=self.name,
+                layout=self.layout(),
+                timeout=self.settings.HANDOVER_TIMEOUT,
+            )
+            if takeover and self.take_over():
+                return
+        for interval in self.settings.INTERVALS:
+            self._repos[interval] = CrossMarketStatRepository(
+                markets=self.markets, interval=interval, create=True
+            )
+
+    def layout(self) -> float:
+        return layout_fingerprint(
+            [market.value for market in self.markets], self.settings.INTERVALS
+        )
+
+    def take_over(self) -> bool:
+        """
+        continue the live matrices of the previous instance in place,
+        the windows are rebuilt from the candles on the first update
+        """
+        try:
+            for interval in self.settings.INTERVALS:
+                self._repos[interval] = attach_as_writer(
+                    CrossMarketStatRepository(markets=self.markets, interval=interval)
+                )
+        except FileNotFoundError:
+            LOGGER.warning(f"{self.name}: segments are gone, recreating")
+            for repo in self._repos.values():
+                repo.close()
+            self._repos.clear()
+            return False
+        LOGGER.warning(f"{self.name}: took over the live segments")
+        return True
+
+    def release(self) -> None:
+        """hand the matrices over to the successor, without unlinking them"""
+        for repo in self._repos.values():
+            detach(repo)
+        for repos in self._data_repos.values():
+            for repo in repos:
+                repo.close()
+        self._handover.release(last_trade_time=0)
+        detach(self._handover)
+        self.released = True
+        LOGGER.warning(f"{self.name}: segments handed over")
+
+    @log_exception()
+    async def execute(self) -> None:
+        LOGGER.info(f"{self.name} is executing for {len(self.markets)} markets...")
+        while True:
+            if self._handover:
+                self._handover.beat()
+                if self._handover.get_successor():
+                    self.release()
+                    return
+            for interval in self._repos:
+                self.update(interval)
+            await asyncio.sleep(self.settings.CROSS_MARKET_UPDATE_INTERVAL)
+
+    def update(self, interval: intervals_type) -> None:
+        window = self._windows[interval]
+        repos = self._data_repos[interval]
+        # the newest candle every market has reached
+        live_time = min(repo.get_time() for repo in repos)
+        if live_time == 0:
+            return
+        if live_time > window.live_time:
+            step = to_time(interval)
+            if window.live_time and live_time - window.live_time == step:
+                window.push(self.log_closes(repos, window.live_time))
+            else:
+                self.rebuild(interval, live_time)
+            window.live_time = live_time
+        window.stats(self.log_closes(repos, live_time), self._out)
+        self._repos[interval].set_matrices(self._out, live_time)
+
+    def rebuild(self, interval: intervals_type, live_time: float) -> None:
+        """refill the window from the repositories, on start or after a gap"""
+        window = self._windows[interval]
+        repos = self._data_repos[interval]
+        step = to_time(interval)
+        window.clear()
+        closed = window.ring_r.shape[0] + 1
+        for k in range(closed, 0, -1):
+            window.push(self.log_closes(repos, live_time - k * step))
+
+    @staticmethod
+    def log_closes(repos: List[MarketDataRepository], time: float) -> np.ndarray:
+        """log close of every market at `time`, forward filled if a market has no candle"""
+        l = np.full(len(repos), np.nan)
+        for i, repo in enumerate(repos):
+            row = np.searchsorted(repo.get_times(), time, side="right")
+            if row == 0:
+                continue
+            close = repo.get_closes()[row - 1]
+            if close > 0:
+                l[i] = np.log(close)
+        return l
+
+    async def postpare(self) -> None:
+        self.profiler.stop()
+        if self.released:
+            return
+        if self._handover:
+            self._handover.close()
+        for repo in self._repos.values():
+            repo.close()
+        for repos in self._data_repos.values():
+            for repo in repos:
+                repo.close()
@@ -7,6 +7,8 @@ from fifi.enums import Exchange, Market
 from fifi import BaseEngine
 from fifi.repository.shm.market_data_repository import intervals_type
 
+from ...utils.intervals_channel import IntervalsChannel
+
 
 class BaseExchangeWorker(BaseEngine, ABC):
     exchange: Exchange
@@ -14,11 +16,13 @@ class BaseExchangeWorker(BaseEngine, ABC):
     intervals: List[intervals_type]
     last_update_timestamp: float
     shutdown_event: EventType
+    intervals_channel: IntervalsChannel
 
     def __init__(self, market: Market):
         super().__init__(run_in_process=True)
         self.market = market
         self.shutdown_event = Event()
+        self.intervals_channel = IntervalsChannel()
 
     @abstractmethod
     def ignite(self):
@@ -29,3 +33,7 @@ class BaseExchangeWorker(BaseEngine, ABC):
     def shutdown(self):
         """Cleanup tasks and shutdown logic"""
         pass
+
+    def set_intervals(self, intervals: List[intervals_type]):
+        """called by the manager, the worker process opens/closes the changed intervals"""
+        self.intervals_channel.send(intervals)
@@ -1,30 +1,51 @@
 import asyncio
 import json
+import logging
 import time
 import threading
-from queue import Queue
 from fifi.types.market import intervals_type
 import websocket
-from typing import Any, Dict, Optional, Set
+from typing import Any, Dict, List, Optional, Set
 
 from hyperliquid.info import Info
 from hyperliquid.utils import constants
 
-from fifi import BaseEngine, log_exception, LoggerFactory, MarketDataRepository
+from fifi import BaseEngine, log_exception, LoggerFactory
 from fifi.enums import Exchange, Market
 
 from .base import BaseExchangeWorker
-from ...common.settings import Settings
+from ...common.settings import Settings, adopt_intervals
+from ...repository.shm.candle_flow_repository import CandleFlowRepository
+from ...repository.shm.candle_revision_repository import CandleRevisionRepository
+from ...repository.shm.handoff_stats_repository import HandoffStatsRepository
+from ...repository.shm.handover_repository import (
+    HandoverRepository,
+    attach_as_writer,
+    detach,
+    layout_fingerprint,
+)
+from ...repository.shm.market_data_repository import MarketDataRepository
+from ...utils.handoff_buffer import CandleDelta, CandleDeltas, HandoffBuffer
+from ...utils.handover import claim
+from ...utils.trade_id_index import TradeIdIndex
+from ...utils.trade_sequence import TradeSequence
+from ...utils.profiler import start_profiler
 from ...helpers.hyperliquid_helpers import *
 from ...helpers.intervals_helpers import *
 
 
 RECONNECT_MIN_DELAY = 2
 RECONNECT_MAX_DELAY = 20
+# queued by HyperWS after a reconnect, the interpreter re-syncs the missed candles
+RESYNC = "resync"
+# the interpreter waits at most this long for trades before checking its controls
+CONTROL_POLL = 1.0
 
 
 class HyperWS(BaseEngine):
-    def __init__(self, market: Market, msg_queue: Queue):
+    def __init__(
+        self, market: Market, msg_queue: HandoffBuffer, resync_on_open: bool = False
+    ):
         super().__init__(run_in_process=False, catch_interrupt=False)
         self.name = f"HyperWS-{market.value}"
         self.LOGGER = LoggerFactory().get(self.name)
@@ -43,7 +64,10 @@ class HyperWS(BaseEngine):
         self._ws: Optional[websocket.WebSocketApp] = None
         self._ws_thread: Optional[threading.Thread] = None
         self._ws_reset = False
+        self.connected = False
+        self.resync_on_open = resync_on_open
         self.last_update_timestamp = 0
+        self.last_pong_timestamp = 0
         self.reconnect_delay = RECONNECT_MIN_DELAY
 
     async def prepare(self):
@@ -87,9 +111,15 @@ class HyperWS(BaseEngine):
                 }
             )
             self.LOGGER.info(f"{self.market.value}: subscribe trades in ws...")
+            if self.resync_on_open:
+                self.msg_queue.put(RESYNC)
+            # every later open is a reconnect, trades may have been missed
+            self.resync_on_open = True
             self.last_update_timestamp = time.time()
+            self.last_pong_timestamp = time.time()
             self.reconnect_delay = RECONNECT_MIN_DELAY
             self._ws_reset = False
+            self.connected = True
         except Exception as e:  # pragma: no cover
             self.LOGGER.error(str(e))
             raise
@@ -113,15 +143,23 @@ class HyperWS(BaseEngine):
             )
         self._ws.send(json.dumps(obj))
 
+    def ping(self) -> None:
+        try:
+            self._send_ws({"method": "ping"})
+        except Exception as e:
+            self.LOGGER.error(f"{self.market.value}: ping failed: {e}")
+
     def _on_close(
         self, ws: websocket.WebSocketApp, status_code: int, msg: str
     ) -> None:  # pragma: no cover
         self._ws_reset = True
+        self.connected = False
         self.LOGGER.error(f"{self.market.value}: closed ws: {status_code=} {msg=}")
 
     def close_ws(self) -> None:
         try:
             if self._ws:
+                self.connected = False
                 self._ws.close()
                 self._ws_reset = True
         except:
@@ -141,6 +179,9 @@ class HyperWS(BaseEngine):
         data = msg.get("data")
         if channel == "subscriptionResponse":
             return
+        if channel == "pong":
+            self.last_pong_timestamp = time.time()
+            return
         if channel == "trades":
             if isinstance(data, list):
                 self.msg_queue.put(data)
@@ -150,10 +191,12 @@ class HyperWS(BaseEngine):
 
 class TradesInterpretor(BaseEngine):
     _repos: Dict[intervals_type, MarketDataRepository]
+    _flows: Dict[intervals_type, CandleFlowRepository]
+    _revisions: Dict[intervals_type, CandleRevisionRepository]
     _unique_traders: Dict[intervals_type, Set[str]]
     info: Info
 
-    def __init__(self, market: Market, msg_queue: Queue):
+    def __init__(self, market: Market, msg_queue: HandoffBuffer):
         super().__init__(run_in_process=False)
         self.name = f"TradesInterpretor-{market.value}"
         self.LOGGER = LoggerFactory().get(self.name)
@@ -162,24 +205,134 @@ class TradesInterpretor(BaseEngine):
         self.settings = Settings()
         self.intervals = self.settings.INTERVALS
         self.info = Info(skip_ws=True)
+        self._sequence = TradeSequence(capacity=self.settings.TRADE_DEDUPE_CAPACITY)
+        self._pending_intervals: Optional[List[intervals_type]] = None
+        self._handover: Optional[HandoverRepository] = None
+        self.released = False
+        # guards the repositories against the health calls of the worker thread
+        self._repos_lock = threading.Lock()
+        # intervals whose last candle was opened by the rollover, without trades
+        self._flat: Set[intervals_type] = set()
 
     @log_exception()
     async def prepare(self):
+        TradeIdIndex.warmup()
         self._repos = dict()
+        self._flows = dict()
+        self._revisions = dict()
         self._unique_traders = dict()
-        for interval in self.intervals:
-            self._repos[interval] = MarketDataRepository(
-                market=self.market, interval=interval, create=True
+        if self.settings.HANDOVER_ENABLED:
+            self._handover, takeover, last_trade_time = await claim(
+                name=self.name,
+                layout=self.layout(),
+                timeout=self.settings.HANDOVER_TIMEOUT,
             )
-            self._unique_traders[interval] = set()
-            self.update_data(last_trade_time=0, interval=interval)
+            if takeover and self.take_over(last_trade_time):
+                return
+        for interval in self.intervals:
+            self.open_interval(interval)
             await asyncio.sleep(60)
 
+    def layout(self) -> float:
+        return layout_fingerprint(
+            self.intervals,
+            [self.settings.get_history_depth(i) for i in self.intervals],
+            self.settings.COMPACT_STORAGE,
+            self.settings.VOLUME_PROFILE_BINS,
+        )
+
+    def take_over(self, last_trade_time: float) -> bool:
+        """
+        continue writing the live segments of the previous instance in place,
+        False if one of them is gone
+        """
+        try:
+            for interval in self.intervals:
+                self.open_interval(interval, create=False)
+        except FileNotFoundError:
+            self.LOGGER.warning(f"{self.market.value}: segments are gone, recreating")
+            for repo in [
+                *self._repos.values(),
+                *self._flows.values(),
+                *self._revisions.values(),
+            ]:
+                repo.close()
+            self._repos.clear()
+            self._flows.clear()
+            self._revisions.clear()
+            return False
+        last_tids = self._handover.get_last_tids()
+        if last_trade_time and last_tids is not None:
+            # the trades up to the release are in the segments, those of its
+            # last millisecond not applied yet are still accepted
+            self._sequence.resume(int(last_trade_time), last_tids)
+        elif last_trade_time:
+            self._sequence.reset(int(last_trade_time) + 1)
+        else:
+            # the previous writer died, re-sync from its last candle
+            self._sequence.reset(int(max(r.get_time() for r in self._repos.values())))
+            self.resync()
+        self.LOGGER.warning(f"{self.market.value}: took over the live segments")
+        return True
+
+    def release(self) -> None:
+        """hand the segments over to the successor, without unlinking them"""
+        with self._repos_lock:
+            # the health calls of the worker thread stop before the mappings go
+            self.released = True
+            for repo in [
+                *self._repos.values(),
+                *self._flows.values(),
+                *self._revisions.values(),
+            ]:
+                detach(repo)
+        self._handover.release(
+            last_trade_time=self._sequence.last_time,
+            last_tids=self._sequence.last_tids(),
+        )
+        detach(self._handover)
+        self.LOGGER.warning(f"{self.market.value}: segments handed over")
+
     @log_exception()
     async def execute(self):
         while True:
-            trades = self.msg_queue.get()
+            if self._handover:
+                self._handover.beat()
+                if self._handover.get_successor():
+                    self.release()
+                    return
+            if self.settings.CANDLE_ROLLOVER:
+                self.roll_candles()
+            trades = self.msg_queue.get(timeout=self.rollover_timeout())
+            if self._pending_intervals is not None:
+                self.apply_intervals()
+            if trades is None:
+                await asyncio.sleep(0)
+                continue
+            if self.msg_queue.take_overflow():
+                self.LOGGER.warning(
+                    f"{self.market.value}: hand-off buffer dropped data"
+                )
+                self.resync()
+            if trades == RESYNC:
+                self.resync()
+                continue
+            if isinstance(trades, CandleDeltas):
+                for delta in trades:
+                    if not self._sequence.accept_delta(delta):
+                        continue
+                    for interval in self.intervals:
+                        self._ingest_delta(delta=delta, interval=interval)
+                partial_from = self._sequence.take_partial()
+                if partial_from is not None:
+                    self.LOGGER.warning(
+                        f"{self.market.value}: coalesced trades were partly replayed"
+                    )
+                    self.resync(from_time=partial_from)
+                continue
             for trade in trades:
+                if not self._sequence.accept(trade):
+                    continue
                 for interval in self.intervals:
                     self._ingest_trade(trade=trade, interval=interval)
             await asyncio.sleep(0)
@@ -187,6 +340,7 @@ class TradesInterpretor(BaseEngine):
     def _ingest_trade(self, trade: Dict, interval: intervals_type):
         price = float(trade["px"])
         size = float(trade["sz"])
+        large = price * size >= self.settings.LARGE_TRADE_NOTIONAL
         last_candle_time = self._repos[interval].get_time()
         next_candle_time = last_candle_time + to_time(interval)
         if trade["time"] < last_candle_time:
@@ -202,8 +356,20 @@ class TradesInterpretor(BaseEngine):
             self._repos[interval].set_open_price(price)
             self._repos[interval].set_high_price(price)
             self._repos[interval].set_low_price(price)
+            self.create_flow(interval=interval, time=next_candle_time, open=price)
+            self._flat.discard(interval)
+        elif interval in self._flat:
+            self.reopen_candle(interval=interval, open=price)
         self._repos[interval].set_last_trade(price)
         self._repos[interval].add_vol(size)
+        self._flows[interval].add_trades(price=price, size=size)
+        self._flows[interval].add_order_flow(
+            first_price=price,
+            last_price=price,
+            signed_vol=size if trade["side"] == "B" else -size,
+            large_buys=trade["side"] == "B" and large,
+            large_sells=trade["side"] == "A" and large,
+        )
         self._repos[interval].set_close_price(price)
         if price < self._repos[interval].get_lows(-1)[0]:
             self._repos[interval].set_low_price(price)
@@ -224,6 +390,58 @@ class TradesInterpretor(BaseEngine):
                 elif trade["side"] == "A" and trade["users"].index(user) == 1:
                     self._repos[interval].add_seller_count(1)
 
+    def _ingest_delta(self, delta: CandleDelta, interval: intervals_type):
+        """apply trades coalesced by the hand-off buffer, all within one candle"""
+        repo = self._repos[interval]
+        last_candle_time = repo.get_time()
+        next_candle_time = last_candle_time + to_time(interval)
+        if delta.time < last_candle_time:
+            return
+        elif delta.time - to_time(interval) > next_candle_time:
+            self.update_data(last_trade_time=delta.time, interval=interval)
+            return
+        elif delta.time >= next_candle_time:
+            repo.create_candle()
+            self._unique_traders[interval].clear()
+            repo.set_time(next_candle_time)
+            repo.set_open_price(delta.open)
+            repo.set_high_price(delta.high)
+            repo.set_low_price(delta.low)
+            self.create_flow(interval=interval, time=next_candle_time, open=delta.open)
+            self._flat.discard(interval)
+        elif interval in self._flat:
+            self.reopen_candle(interval=interval, open=delta.open)
+        repo.set_last_trade(delta.close)
+        repo.add_vol(delta.vol)
+        if delta.vol > 0:
+            # the coalesced trades are binned at their vwap
+            self._flows[interval].add_trades(
+                price=delta.notional / delta.vol, size=delta.vol, count=delta.trades
+            )
+        self._flows[interval].add_order_flow(
+            first_price=delta.open,
+            last_price=delta.close,
+            signed_vol=delta.buyer_vol - delta.seller_vol,
+            realized_var=delta.realized_var,
+            large_buys=delta.large_buys,
+            large_sells=delta.large_sells,
+        )
+        repo.set_close_price(delta.close)
+        if delta.low < repo.get_lows(-1)[0]:
+            repo.set_low_price(delta.low)
+        if delta.high > repo.get_highs(-1)[0]:
+            repo.set_high_price(delta.high)
+        repo.add_buyer_vol(delta.buyer_vol)
+        repo.add_seller_vol(delta.seller_vol)
+        for user in delta.users:
+            if not user in self._unique_traders[interval]:
+                self._unique_traders[interval].add(user)
+                repo.add_unique_traders(1)
+                if user in delta.buyers:
+                    repo.add_buyer_count(1)
+                elif user in delta.sellers:
+                    repo.add_seller_count(1)
+
     def update_data(self, last_trade_time: int, interval: intervals_type) -> None:
         end_time = last_trade_time - (last_trade_time % to_time(interval))
         if last_trade_time == 0:
@@ -249,18 +467,240 @@ class TradesInterpretor(BaseEngine):
             self._repos[interval].set_low_price(float(candle["l"]))
             self._repos[interval].set_vol(float(candle["v"]))
             self._repos[interval].set_time(candle["t"])
-
-    def raise_unhealthy(self):
+            # the snapshot has no trades, only their count
+            self.create_flow(
+                interval=interval, time=candle["t"], open=float(candle["o"])
+            )
+            self._flows[interval].set_trade_count(candle["n"])
+
+    def resync(self, from_time: Optional[int] = None) -> None:
+        """
+        re-sync only the candles touched since the last ingested trade (or
+        `from_time` if earlier), instead of rebuilding the whole window
+        """
+        if self._sequence.last_time == 0:
+            # nothing ingested yet, the backfill of prepare covers it
+            return
+        from_time = min(from_time or self._sequence.last_time, self._sequence.last_time)
+        resync_time = int(time.time() * 1000)
         for interval in self.intervals:
+            self.resync_candles(
+                interval=interval, from_time=from_time, end_time=resync_time
+            )
+        # trades until the resync are in the snapshot, the replayed ones are dropped
+        self._sequence.reset(resync_time)
+        self.LOGGER.warning(
+            f"{self.market.value}: re-synced candles since {from_time}, "
+            f"{self._sequence.duplicates=} {self._sequence.out_of_order=}"
+        )
+        self.back_to_healthy()
+
+    def resync_candles(
+        self, interval: intervals_type, from_time: int, end_time: int
+    ) -> None:
+        """
+        rewrite the candles since `from_time` from the exchange snapshot.
+        The snapshot has the OHLCV and trade count only: the buyer/seller
+        volumes and counts, the unique traders and the flow (VWAP, order flow,
+        profile) of the rewritten candles are zeroed and can't be rebuilt; the
+        trades after the re-sync are added to them again
+        """
+        repo = self._repos[interval]
+        candles = self.info.candles_snapshot(
+            name=market_to_hyper_market(self.market),
+            interval=interval,
+            startTime=from_time - (from_time % to_time(interval)),
+            endTime=end_time,
+        )
+        rewritten_from = None
+        for candle in candles:
+            row = repo.find_candle(candle["t"])
+            if row is not None:
+                repo.set_candle(
+                    row=row,
+                    open=float(candle["o"]),
+                    high=float(candle["h"]),
+                    low=float(candle["l"]),
+                    close=float(candle["c"]),
+                    vol=float(candle["v"]),
+                )
+                self._flows[interval].reset_candle(
+                    row=row, trades=candle["n"], close=float(candle["c"])
+                )
+                if rewritten_from is None:
+                    rewritten_from = candle["t"]
+                if candle["t"] == repo.get_time():
+                    self._flat.discard(interval)
+                    self._unique_traders[interval].clear()
+            elif candle["t"] > repo.get_time():
+                repo.create_candle()
+                self._unique_traders[interval].clear()
+                repo.set_time(candle["t"])
+                repo.set_open_price(float(candle["o"]))
+                repo.set_high_price(float(candle["h"]))
+                repo.set_low_price(float(candle["l"]))
+                repo.set_close_price(float(candle["c"]))
+                repo.set_vol(float(candle["v"]))
+                self.create_flow(
+                    interval=interval, time=candle["t"], open=float(candle["o"])
+                )
+                self._flows[interval].set_trade_count(candle["n"])
+        if candles:
+            repo.set_last_trade(float(candles[-1]["c"]))
+        if rewritten_from is not None:
+            # the stat history of the rewritten candles is recomputed by the indicator engine
+            self._revisions[interval].revise(from_time=rewritten_from)
+
+    def set_intervals(self, intervals: List[intervals_type]) -> None:
+        """applied by the interpreter thread between two trade batches"""
+        self._pending_intervals = list(intervals)
+
+    def apply_intervals(self) -> None:
+        intervals, self._pending_intervals = self._pending_intervals, None
+        removed = [i for i in self.intervals if i not in intervals]
+        # the health calls only see the kept intervals until the added ones are backfilled
+        self.intervals = [i for i in self.intervals if i in intervals]
+        adopt_intervals(self.settings, intervals, self.settings.CONFIG_FILE)
+        for interval in removed:
+            self.close_interval(interval)
+        for interval in intervals:
+            if interval not in self._repos:
+                self.open_interval(interval)
+                self._repos[interval].health.set_is_updated()
+        self.intervals = intervals
+        if self._handover:
+            self._handover.set_layout(self.layout())
+        self.LOGGER.info(f"{self.market.value}: running intervals {intervals}")
+
+    def open_interval(self, interval: intervals_type, create: bool = True) -> None:
+        """create the segments of `interval` and backfill them, or attach to the live ones"""
+        repo = MarketDataRepository(
+            market=self.market,
+            interval=interval,
+            create=create,
+            rows=self.settings.get_history_depth(interval),
+            compact=self.settings.COMPACT_STORAGE,
+        )
+        self._repos[interval] = repo if create else attach_as_writer(repo)
+        flow = CandleFlowRepository(
+            market=self.market,
+            interval=interval,
+            bins=self.settings.VOLUME_PROFILE_BINS,
+            create=create,
+            rows=self.settings.get_history_depth(interval),
+            compact=self.settings.COMPACT_STORAGE,
+        )
+        self._flows[interval] = flow if create else attach_as_writer(flow)
+        revision = CandleRevisionRepository(
+            market=self.market, interval=interval, create=create
+        )
+        self._revisions[interval] = revision if create else attach_as_writer(revision)
+        self._unique_traders[interval] = set()
+        if create:
+            self.update_data(last_trade_time=0, interval=interval)
+
+    def close_interval(self, interval: intervals_type) -> None:
+        """unlink the segments of `interval`, readers keep their mapping until they close"""
+        with self._repos_lock:
             self._repos[interval].health.clear_is_updated()
+            self._repos.pop(interval).close()
+        self._flows.pop(interval).close()
+        self._revisions.pop(interval).close()
+        self._unique_traders.pop(interval)
+        self._flat.discard(interval)
+
+    def create_flow(self, interval: intervals_type, time: int, open: float) -> None:
+        """open the flow row of a new candle, next to its OHLC row"""
+        self._flows[interval].create_candle(
+            time=time, open_price=open, step=self.profile_step(interval, open)
+        )
+
+    def profile_step(self, interval: intervals_type, open: float) -> float:
+        minutes = to_time(interval) / (60 * 1000)
+        return open * self.settings.VOLUME_PROFILE_BIN_BPS / 10000 * minutes**0.5
+
+    def rollover_timeout(self) -> float:
+        """seconds until the next candle boundary (plus grace), at most CONTROL_POLL"""
+        if not self.settings.CANDLE_ROLLOVER:
+            return CONTROL_POLL
+        boundaries = [
+            repo.get_time() + to_time(interval)
+            for interval, repo in self._repos.items()
+            if repo.get_time()
+        ]
+        if not boundaries:
+            return CONTROL_POLL
+        wait = min(boundaries) / 1000 + self.settings.CANDLE_ROLLOVER_GRACE
+        return min(CONTROL_POLL, max(0.0, wait - time.time()))
+
+    def roll_candles(self) -> None:
+        """close the candles whose boundary passed without a trade of the next one"""
+        now = (time.time() - self.settings.CANDLE_ROLLOVER_GRACE) * 1000
+        for interval, repo in self._repos.items():
+            step = to_time(interval)
+            while repo.get_time() and repo.get_time() + step <= now:
+                self.open_flat_candle(interval)
+
+    def open_flat_candle(self, interval: intervals_type) -> None:
+        """zero volume candle at the close of the last one"""
+        repo = self._repos[interval]
+        candle_time = repo.get_time() + to_time(interval)
+        close = repo.get_closes(-1)[0]
+        repo.create_candle()
+        self._unique_traders[interval].clear()
+        repo.set_time(candle_time)
+        repo.set_open_price(close)
+        repo.set_high_price(close)
+        repo.set_low_price(close)
+        repo.set_close_price(close)
+        self.create_flow(interval=interval, time=candle_time, open=close)
+        self._flat.add(interval)
+
+    def reopen_candle(self, interval: intervals_type, open: float) -> None:
+        """the first trade of a flat candle is its open, like the exchange candles"""
+        repo = self._repos[interval]
+        repo.set_open_price(open)
+        repo.set_high_price(open)
+        repo.set_low_price(open)
+        self._flows[interval].open_candle(
+            time=repo.get_time(),
+            open_price=open,
+            step=self.profile_step(interval, open),
+        )
+        self._flat.discard(interval)
+
+    def raise_unhealthy(self):
+        with self._repos_lock:
+            if self.released:
+                return
+            for interval in self.intervals:
+                repo = self._repos.get(interval)
+                if repo:
+                    repo.health.clear_is_updated()
 
     def back_to_healthy(self):
-        for interval in self.intervals:
-            self._repos[interval].health.set_is_updated()
+        with self._repos_lock:
+            if self.released:
+                return
+            for interval in self.intervals:
+                repo = self._repos.get(interval)
+                if repo:
+                    repo.health.set_is_updated()
 
     async def postpare(self):
-        for interval, repo in self._repos.items():
-            repo.close()
+        if self.released:
+            return
+        with self._repos_lock:
+            for interval, repo in self._repos.items():
+                repo.close()
+            # the health calls of the worker thread find nothing to write
+            self._repos.clear()
+        for flow in self._flows.values():
+            flow.close()
+        for revision in self._revisions.values():
+            revision.close()
+        if self._handover:
+            self._handover.close()
 
 
 class HyperliquidExchangeWorker(BaseExchangeWorker):
@@ -286,7 +726,16 @@ class HyperliquidExchangeWorker(BaseExchangeWorker):
     @log_exception()
     async def prepare(self):
         self.LOGGER.info("init worker exchange...")
-        self.msg_queue = Queue()
+        # one profiler per process, HyperWS and TradesInterpretor are its threads
+        self.profiler = start_profiler(self.name)
+        self.msg_queue = HandoffBuffer(
+            capacity=self.settings.HANDOFF_CAPACITY,
+            policy=self.settings.HANDOFF_OVERFLOW_POLICY,
+            large_notional=self.settings.LARGE_TRADE_NOTIONAL,
+        )
+        self._handoff_drops = 0
+        self._handoff_stats = HandoffStatsRepository(market=self.market, create=True)
+        self._next_handoff_report = time.time() + self.settings.HANDOFF_REPORT_INTERVAL
         self.hyper_ws = HyperWS(market=self.market, msg_queue=self.msg_queue)
         self.hyper_ws.start()
         self.trades_intrepretor = TradesInterpretor(
@@ -302,49 +751,103 @@ class HyperliquidExchangeWorker(BaseExchangeWorker):
     @log_exception()
     async def execute(self):
         # watch dog procedure
+        next_reset_check = time.time()
         while True:
-            if (
-                time.time() - self.hyper_ws.last_update_timestamp
-                > self.settings.HARD_RESET_TIME_THRESHOLD
-            ):
-                if self.hard_reset:
-                    self.LOGGER.critical(
-                        f"Hard Reset Not Working, retry {self.hard_reset_retry}th..."
-                    )
-                try:
-                    self.trades_intrepretor.raise_unhealthy()
-                    self.LOGGER.critical(f"HARD reset")
-                    self.hyper_ws.stop()
-                    del self.hyper_ws
-                    self.hyper_ws = HyperWS(
-                        market=self.market, msg_queue=self.msg_queue
-                    )
-                    self.hyper_ws.start()
-                    self.hard_reset = True
-                    self.hard_reset_retry += 1
-                except Exception as e:
-                    self.LOGGER.error(f"Error: {e}")
-
-            elif (
-                time.time() - self.hyper_ws.last_update_timestamp
-                > self.settings.RESET_TIME_THRESHOLD
-            ):
+            if self.trades_intrepretor.released:
+                # the successor instance writes the segments, wait to be stopped
+                self.LOGGER.warning("handed over, closing the websocket")
+                self.hyper_ws.shutdown()
+                while True:
+                    await asyncio.sleep(self.settings.HEARTBEAT_INTERVAL)
+            self.heartbeat()
+            self._handoff_stats.publish(self.msg_queue)
+            intervals = self.intervals_channel.receive()
+            if intervals is not None:
+                self.trades_intrepretor.set_intervals(intervals)
+            if time.time() >= next_reset_check:
+                self.report_handoff()
+                self.check_resets()
+                next_reset_check = time.time() + 10 * self.hard_reset_retry
+            await asyncio.sleep(self.settings.HEARTBEAT_INTERVAL)
+
+    def heartbeat(self) -> None:
+        """
+        ping the exchange every HEARTBEAT_INTERVAL, a connection that stays up
+        but stops answering is reset within HEARTBEAT_TIMEOUT; the missed candles
+        are re-synced by the interpreter after the reconnect
+        """
+        if not self.hyper_ws.connected:
+            return
+        silence = time.time() - self.hyper_ws.last_pong_timestamp
+        if silence > self.settings.HEARTBEAT_TIMEOUT:
+            self.trades_intrepretor.raise_unhealthy()
+            self.LOGGER.warning(f"no pong for {silence:.2f}s, reconnecting...")
+            self.hyper_ws.reset()
+            return
+        self.hyper_ws.ping()
+
+    def report_handoff(self) -> None:
+        """
+        log the hand-off buffer counters every HANDOFF_REPORT_INTERVAL, and as
+        a warning as soon as data was dropped or coalesced
+        """
+        drops = self.msg_queue.dropped + self.msg_queue.coalesced
+        dropping = drops != self._handoff_drops
+        if not dropping and time.time() < self._next_handoff_report:
+            return
+        self._handoff_drops = drops
+        self._next_handoff_report = time.time() + self.settings.HANDOFF_REPORT_INTERVAL
+        self.LOGGER.log(
+            logging.WARNING if dropping else logging.INFO,
+            f"hand-off buffer: depth={self.msg_queue.depth} "
+            f"high_water_mark={self.msg_queue.high_water_mark}/{self.msg_queue.capacity} "
+            f"dropped={self.msg_queue.dropped} coalesced={self.msg_queue.coalesced}",
+        )
+
+    def check_resets(self) -> None:
+        if (
+            time.time() - self.hyper_ws.last_update_timestamp
+            > self.settings.HARD_RESET_TIME_THRESHOLD
+        ):
+            if self.hard_reset:
+                self.LOGGER.critical(
+                    f"Hard Reset Not Working, retry {self.hard_reset_retry}th..."
+                )
+            try:
                 self.trades_intrepretor.raise_unhealthy()
-                self.LOGGER.info(f"SOFT reset")
-                self.hyper_ws.reset()
-                self.soft_reset = True
-            elif self.hard_reset or self.soft_reset:
-                self.trades_intrepretor.back_to_healthy()
-                self.hard_reset = False
-                self.soft_reset = False
-                self.hard_reset_retry = 1
-            await asyncio.sleep(10 * self.hard_reset_retry)
+                self.LOGGER.critical(f"HARD reset")
+                self.hyper_ws.stop()
+                del self.hyper_ws
+                self.hyper_ws = HyperWS(
+                    market=self.market, msg_queue=self.msg_queue, resync_on_open=True
+                )
+                self.hyper_ws.start()
+                self.hard_reset = True
+                self.hard_reset_retry += 1
+            except Exception as e:
+                self.LOGGER.error(f"Error: {e}")
+
+        elif (
+            time.time() - self.hyper_ws.last_update_timestamp
+            > self.settings.RESET_TIME_THRESHOLD
+        ):
+            self.trades_intrepretor.raise_unhealthy()
+            self.LOGGER.info(f"SOFT reset")
+            self.hyper_ws.reset()
+            self.soft_reset = True
+        elif self.hard_reset or self.soft_reset:
+            self.trades_intrepretor.back_to_healthy()
+            self.hard_reset = False
+            self.soft_reset = False
+            self.hard_reset_retry = 1
 
     async def postpare(self):
         self.LOGGER.info(f"shutting down {self.name} trades_intrepretor....")
         self.trades_intrepretor.stop()
         self.LOGGER.info(f"shutting down {self.name} websocket ....")
         self.hyper_ws.shutdown()
+        self._handoff_stats.close()
+        self.profiler.stop()
 
     @log_exception()
     def shutdown(self):
@@ -0,0 +1,225 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+from fastapi import WebSocket
+from fifi import LoggerFactory, MarketStatRepository
+from fifi.enums import Market
+from fifi.types.market import intervals_type
+
+from ...helpers.gateway_helpers import last_candle_to_dict, last_stats_to_dict, to_topic
+from ...repository.shm.market_data_repository import MarketDataRepository
+
+
+LOGGER = LoggerFactory().get(__name__)
+
+
+class Subscriber:
+    """
+    One websocket client. Updates are handed over as already serialized
+    payloads through a bounded queue, so a slow client only fills its own
+    queue and gets dropped instead of stalling the broadcast.
+    `markets` and `intervals` select the topics, None selects all of them,
+    including the topics added while the client is connected.
+    """
+
+    __slots__ = ("websocket", "queue", "topics", "markets", "intervals", "dropped")
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        markets: Optional[Set[str]],
+        intervals: Optional[Set[str]],
+        queue_size: int,
+    ):
+        self.websocket = websocket
+        self.markets = markets
+        self.intervals = intervals
+        self.topics: Set[str] = set()
+        self.queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def wants(self, market: Market, interval: intervals_type) -> bool:
+        return (self.markets is None or market.value in self.markets) and (
+            self.intervals is None or interval in self.intervals
+        )
+
+    def offer(self, payload: bytes) -> bool:
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drop(self) -> None:
+        if self.dropped:
+            return
+        self.dropped = True
+        # make room for the sentinel, pending payloads are useless now
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def pump(self) -> None:
+        while True:
+            payload = await self.queue.get()
+            if payload is None:
+                return
+            await self.websocket.send_bytes(payload)
+
+
+class Broadcaster:
+    """
+    Polls the shared memory repositories and pushes every changed candle or
+    stat row to the subscribers of its topic. Each update is serialized once
+    and the same JSON bytes are offered to all subscribers, as binary frames.
+    Topics are added and removed in place when the markets or intervals
+    change, the clients of the other topics stay connected.
+    """
+
+    _data_repos: Dict[str, MarketDataRepository]
+    _stat_repos: Dict[str, MarketStatRepository]
+    _subscribers: Dict[str, Set[Subscriber]]
+    _clients: Set[Subscriber]
+    _last_rows: Dict[Tuple[str, str], Dict[str, float]]
+    _last_payloads: Dict[Tuple[str, str], bytes]
+
+    def __init__(
+        self,
+        data_repos: Dict[Market, Dict[intervals_type, MarketDataRepository]],
+        stat_repos: Dict[Market, Dict[intervals_type, MarketStatRepository]],
+        poll_interval: float,
+        queue_size: int,
+    ):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._data_repos = dict()
+        self._stat_repos = dict()
+        self._topics: List[Tuple[str, Market, intervals_type]] = list()
+        self._subscribers = dict()
+        self._clients = set()
+        self._last_rows = dict()
+        self._last_payloads = dict()
+        self.dropped_clients = 0
+        for market, interval_repos in data_repos.items():
+            for interval, repo in interval_repos.items():
+                self.add_topic(market, interval, repo, stat_repos[market][interval])
+
+    @property
+    def topics(self) -> List[str]:
+        return [topic for topic, _, _ in self._topics]
+
+    @property
+    def subscribers_count(self) -> int:
+        return len(self._clients)
+
+    def add_topic(
+        self,
+        market: Market,
+        interval: intervals_type,
+        data_repo: MarketDataRepository,
+        stat_repo: MarketStatRepository,
+    ) -> None:
+        """serve a new market/interval, to the connected clients selecting it too"""
+        topic = to_topic(market, interval)
+        self._topics.append((topic, market, interval))
+        self._data_repos[topic] = data_repo
+        self._stat_repos[topic] = stat_repo
+        self._subscribers[topic] = set()
+        for subscriber in self._clients:
+            if subscriber.wants(market, interval):
+                subscriber.topics.add(topic)
+                self._subscribers[topic].add(subscriber)
+
+    def remove_topic(self, market: Market, interval: intervals_type) -> None:
+        """stop serving a market/interval, its repositories can be closed after"""
+        topic = to_topic(market, interval)
+        self._topics.remove((topic, market, interval))
+        self._data_repos.pop(topic)
+        self._stat_repos.pop(topic)
+        for subscriber in self._subscribers.pop(topic):
+            subscriber.topics.discard(topic)
+        for kind in ("candle", "stat"):
+            self._last_rows.pop((topic, kind), None)
+            self._last_payloads.pop((topic, kind), None)
+
+    def subscribe(
+        self,
+        websocket: WebSocket,
+        markets: Optional[Iterable[str]] = None,
+        intervals: Optional[Iterable[str]] = None,
+    ) -> Subscriber:
+        subscriber = Subscriber(
+            websocket=websocket,
+            markets=set(markets) if markets is not None else None,
+            intervals=set(intervals) if intervals is not None else None,
+            queue_size=self.queue_size,
+        )
+        self._clients.add(subscriber)
+        for topic, market, interval in self._topics:
+            if not subscriber.wants(market, interval):
+                continue
+            subscriber.topics.add(topic)
+            self._subscribers[topic].add(subscriber)
+            # initial snapshot so clients don't wait for the next change
+            for kind in ("candle", "stat"):
+                payload = self._last_payloads.get((topic, kind))
+                if payload is not None:
+                    subscriber.offer(payload)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._clients.discard(subscriber)
+        for topic in subscriber.topics:
+            self._subscribers[topic].discard(subscriber)
+
+    async def run(self) -> None:
+        LOGGER.info(f"broadcasting {len(self._topics)} topics...")
+        while True:
+            for topic, market, interval in self._topics:
+                self._publish(
+                    topic,
+                    market,
+                    interval,
+                    "candle",
+                    last_candle_to_dict(self._data_repos[topic]),
+                )
+                self._publish(
+                    topic,
+                    market,
+                    interval,
+                    "stat",
+                    last_stats_to_dict(self._stat_repos[topic]),
+                )
+            await asyncio.sleep(self.poll_interval)
+
+    def _publish(
+        self,
+        topic: str,
+        market: Market,
+        interval: intervals_type,
+        kind: str,
+        row: Dict[str, float],
+    ) -> None:
+        if self._last_rows.get((topic, kind)) == row:
+            return
+        self._last_rows[(topic, kind)] = row
+        payload = orjson.dumps(
+            {"type": kind, "market": market.value, "interval": interval, "data": row}
+        )
+        self._last_payloads[(topic, kind)] = payload
+
+        slow_clients: List[Subscriber] = list()
+        for subscriber in self._subscribers[topic]:
+            # dropped meanwhile, its pump stops on the sentinel
+            if subscriber.dropped:
+                continue
+            if not subscriber.offer(payload):
+                slow_clients.append(subscriber)
+        for subscriber in slow_clients:
+            LOGGER.warning(f"dropping slow client on {topic}")
+            self.unsubscribe(subscriber)
+            subscriber.drop()
+            self.dropped_clients += 1
@@ -0,0 +1,277 @@
+import asyncio
+from typing import Dict, List, Optional
+
+import numpy as np
+import orjson
+import uvicorn
+from fastapi import FastAPI, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fifi import BaseEngine, MarketStatRepository, log_exception, LoggerFactory
+from fifi.enums import Market
+from fifi.types.market import intervals_type
+
+from ...common.settings import Settings, adopt_intervals
+from ...helpers.gateway_helpers import last_stats_to_dict, to_topic
+from ...repository.shm.market_data_repository import MarketDataRepository
+from ...utils.profiler import start_profiler
+from ...utils.topics_channel import TopicsChannel
+from .broadcaster import Broadcaster, Subscriber
+
+
+LOGGER = LoggerFactory().get(__name__)
+
+CONNECT_RETRY_DELAY = 5
+# the new markets/intervals of a reconfiguration are checked this often
+TOPICS_POLL = 1
+
+
+def orjson_response(content) -> Response:
+    return Response(
+        content=orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
+    )
+
+
+class GatewayEngine(BaseEngine):
+    """
+    Read only gateway serving the shared memory data to remote consumers:
+    REST snapshots and websocket push streams of candle and stat updates.
+    It runs in its own process, so the ingestion processes never see its load.
+    Markets and intervals changed by the manager are served or dropped in
+    place, without restarting the server.
+    """
+
+    name: str
+    _data_repos: Dict[Market, Dict[intervals_type, MarketDataRepository]]
+    _stat_repos: Dict[Market, Dict[intervals_type, MarketStatRepository]]
+    broadcaster: Broadcaster
+    server: uvicorn.Server
+
+    def __init__(self, run_in_process: bool = True):
+        super().__init__(run_in_process)
+        self.name = "GatewayEngine"
+        self.settings = Settings()
+        self._data_repos = dict()
+        self._stat_repos = dict()
+        self._broadcast_task: Optional[asyncio.Task] = None
+        self._topics_task: Optional[asyncio.Task] = None
+        self.topics_channel = TopicsChannel()
+
+    @log_exception()
+    async def prepare(self) -> None:
+        self.profiler = start_profiler(self.name)
+        for market in self.settings.MARKETS:
+            self._data_repos[market] = dict()
+            self._stat_repos[market] = dict()
+            for interval in self.settings.INTERVALS:
+                while True:
+                    try:
+                        self.open_topic(market, interval)
+                        break
+                    except FileNotFoundError:
+                        LOGGER.warning(
+                            f"{market.value}-{interval} shm is not ready, retry in {CONNECT_RETRY_DELAY}s..."
+                        )
+                        await asyncio.sleep(CONNECT_RETRY_DELAY)
+        self.broadcaster = Broadcaster(
+            data_repos=self._data_repos,
+            stat_repos=self._stat_repos,
+            poll_interval=self.settings.GATEWAY_POLL_INTERVAL,
+            queue_size=self.settings.GATEWAY_CLIENT_QUEUE_SIZE,
+        )
+        self.server = uvicorn.Server(
+            uvicorn.Config(
+                app=self.create_app(),
+                host=self.settings.GATEWAY_HOST,
+                port=self.settings.GATEWAY_PORT,
+                log_level=self.settings.LOG_LEVEL.lower(),
+            )
+        )
+
+    @log_exception()
+    async def execute(self) -> None:
+        LOGGER.info(
+            f"{self.name} is serving on {self.settings.GATEWAY_HOST}:{self.settings.GATEWAY_PORT}..."
+        )
+        self._broadcast_task = asyncio.create_task(self.broadcaster.run())
+        self._topics_task = asyncio.create_task(self.watch_topics())
+        await self.server.serve()
+
+    def open_topic(self, market: Market, interval: intervals_type) -> None:
+        """raises FileNotFoundError until the exchange worker created the segments"""
+        data_repo = MarketDataRepository(
+            market=market,
+            interval=interval,
+            rows=self.settings.get_history_depth(interval),
+            compact=self.settings.COMPACT_STORAGE,
+        )
+        try:
+            stat_repo = MarketStatRepository(
+                market=market,
+                interval=interval,
+                rows=self.settings.get_history_depth(interval),
+            )
+        except FileNotFoundError:
+            data_repo.close()
+            raise
+        self._data_repos.setdefault(market, dict())[interval] = data_repo
+        self._stat_repos.setdefault(market, dict())[interval] = stat_repo
+
+    def close_topic(self, market: Market, interval: intervals_type) -> None:
+        self.broadcaster.remove_topic(market, interval)
+        self._data_repos[market].pop(interval).close()
+        self._stat_repos[market].pop(interval).close()
+        if not self._data_repos[market]:
+            self._data_repos.pop(market)
+            self._stat_repos.pop(market)
+        LOGGER.info(f"{market.value}-{interval}: not served anymore")
+
+    def set_topics(
+        self, markets: List[Market], intervals: List[intervals_type]
+    ) -> None:
+        """called by the manager, the gateway process serves the changed topics in place"""
+        self.topics_channel.send(markets, intervals)
+
+    async def watch_topics(self) -> None:
+        """
+        drop the removed markets/intervals and serve the added ones once their
+        segments exist, the others are retried on the next check
+        """
+        while True:
+            await asyncio.sleep(TOPICS_POLL)
+            topics = self.topics_channel.receive()
+            if topics is not None:
+                markets, intervals = topics
+                adopt_intervals(self.settings, intervals, self.settings.CONFIG_FILE)
+                self.settings.MARKETS = markets
+            for market in list(self._data_repos):
+                for interval in list(self._data_repos[market]):
+                    if (
+                        market not in self.settings.MARKETS
+                        or interval not in self.settings.INTERVALS
+                    ):
+                        self.close_topic(market, interval)
+            for market in self.settings.MARKETS:
+                for interval in self.settings.INTERVALS:
+                    if interval in self._data_repos.get(market, dict()):
+                        continue
+                    try:
+                        self.open_topic(market, interval)
+                    except FileNotFoundError:
+                        continue
+                    self.broadcaster.add_topic(
+                        market,
+                        interval,
+                        self._data_repos[market][interval],
+                        self._stat_repos[market][interval],
+                    )
+                    LOGGER.info(f"{market.value}-{interval}: served")
+
+    async def postpare(self) -> None:
+        self.profiler.stop()
+        self.server.should_exit = True
+        if self._broadcast_task:
+            self._broadcast_task.cancel()
+        if self._topics_task:
+            self._topics_task.cancel()
+        for interval_repos in self._data_repos.values():
+            for repo in interval_repos.values():
+                repo.close()
+        for interval_repos in self._stat_repos.values():
+            for repo in interval_repos.values():
+                repo.close()
+
+    def get_data_repo(self, market: str, interval: str) -> MarketDataRepository:
+        try:
+            return self._data_repos[Market(market)][interval]  # type: ignore
+        except (ValueError, KeyError):
+            raise HTTPException(
+                status_code=404, detail=f"{market}-{interval} not found"
+            )
+
+    def get_stat_repo(self, market: str, interval: str) -> MarketStatRepository:
+        try:
+            return self._stat_repos[Market(market)][interval]  # type: ignore
+        except (ValueError, KeyError):
+            raise HTTPException(
+                status_code=404, detail=f"{market}-{interval} not found"
+            )
+
+    def create_app(self) -> FastAPI:
+        app = FastAPI(title="MarketMonitoring Gateway")
+
+        @app.get("/markets")
+        async def markets() -> Response:
+            return orjson_response(
+                {
+                    "markets": [market.value for market in self.settings.MARKETS],
+                    "intervals": self.settings.INTERVALS,
+                }
+            )
+
+        @app.get("/health")
+        async def health() -> Response:
+            return orjson_response(
+                {
+                    to_topic(market, interval): repo.health.is_updated()
+                    for market, interval_repos in self._data_repos.items()
+                    for interval, repo in interval_repos.items()
+                }
+                | {
+                    "subscribers": self.broadcaster.subscribers_count,
+                    "dropped_clients": self.broadcaster.dropped_clients,
+                }
+            )
+
+        @app.get("/candles/{market}/{interval}")
+        async def candles(market: str, interval: str, limit: int = 200) -> Response:
+            repo = self.get_data_repo(market, interval)
+            _from = -max(1, min(limit, repo._rows))
+            return orjson_response(
+                {
+                    "time": np.ascontiguousarray(repo.get_times(_from)),
+                    "open": np.ascontiguousarray(repo.get_opens(_from)),
+                    "high": np.ascontiguousarray(repo.get_highs(_from)),
+                    "low": np.ascontiguousarray(repo.get_lows(_from)),
+                    "close": np.ascontiguousarray(repo.get_closes(_from)),
+                    "vol": np.ascontiguousarray(repo.get_vols(_from)),
+                }
+            )
+
+        @app.get("/stats/{market}/{interval}")
+        async def stats(market: str, interval: str) -> Response:
+            repo = self.get_stat_repo(market, interval)
+            return orjson_response(last_stats_to_dict(repo))
+
+        @app.websocket("/ws")
+        async def stream(
+            websocket: WebSocket,
+            markets: Optional[str] = None,
+            intervals: Optional[str] = None,
+        ) -> None:
+            await websocket.accept()
+            subscriber = self.broadcaster.subscribe(
+                websocket,
+                markets=markets.split(",") if markets else None,
+                intervals=intervals.split(",") if intervals else None,
+            )
+            watcher = asyncio.create_task(self._watch_disconnect(subscriber))
+            try:
+                await subscriber.pump()
+                if subscriber.dropped:
+                    await websocket.close(code=1013)
+            except (WebSocketDisconnect, RuntimeError):
+                pass
+            finally:
+                watcher.cancel()
+                self.broadcaster.unsubscribe(subscriber)
+
+        return app
+
+    async def _watch_disconnect(self, subscriber: Subscriber) -> None:
+        try:
+            while True:
+                message = await subscriber.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+        finally:
+            subscriber.drop()
@@ -0,0 +1,134 @@
+import math
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fifi.enums.market import MarketStat
+from fifi.types.market import intervals_type
+
+from ...enums.extra_stat import ExtraStat
+
+
+# operands read from the forming candle instead of the stats
+CANDLE_OPERANDS = ("CLOSE", "OPEN", "HIGH", "LOW", "VOL")
+OPERANDS = (
+    *CANDLE_OPERANDS,
+    *[stat.name for stat in MarketStat if stat != MarketStat.TIME],
+    *[stat.name for stat in ExtraStat],
+)
+
+RULE_PATTERN = re.compile(
+    r"^(?P<name>\w+)=(?P<interval>\w+):(?P<left>\w+)(?P<op>[<>])"
+    r"(?:(?P<factor>[-+.\deE]+)\*)?(?P<right>[-+.\w]+)$"
+)
+
+event_type = Tuple[int, float, float, int]
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """
+    `left` crossing above (`>`) or below (`<`) `factor * right`, where `right`
+    is an operand or, if `reference` is set, a constant threshold.
+    Written `name=interval:LEFT>RIGHT`, e.g. `overbought=1m:RSI14>70`,
+    `hma_cross=1h:CLOSE>HMA` or `atr_spike=1m:ATR3>1.5*ATR14`.
+    """
+
+    name: str
+    interval: intervals_type
+    left: str
+    above: bool
+    right: Optional[str] = None
+    factor: float = 1.0
+    reference: float = math.nan
+
+
+def parse_alert_rule(rule: str) -> AlertRule:
+    match = RULE_PATTERN.match(rule.replace(" ", ""))
+    if not match:
+        raise ValueError(f"Can't parse the alert rule={rule}")
+    left, right = match["left"].upper(), match["right"].upper()
+    if left not in OPERANDS:
+        raise ValueError(f"There is no operand={left} for the alert rule={rule}")
+    factor = float(match["factor"]) if match["factor"] else 1.0
+    if right in OPERANDS:
+        return AlertRule(
+            name=match["name"],
+            interval=match["interval"],
+            left=left,
+            above=match["op"] == ">",
+            right=right,
+            factor=factor,
+        )
+    try:
+        reference = factor * float(right)
+    except ValueError:
+        raise ValueError(f"There is no operand={right} for the alert rule={rule}")
+    return AlertRule(
+        name=match["name"],
+        interval=match["interval"],
+        left=left,
+        above=match["op"] == ">",
+        reference=reference,
+    )
+
+
+def parse_alert_rules(rules: List[str]) -> List[AlertRule]:
+    """the index of a rule in the list is its id in the alert events"""
+    return [parse_alert_rule(rule) for rule in rules]
+
+
+class AlertEvaluator:
+    """
+    Edge triggered evaluation of the alert rules, after each stat update.
+    A rule fires when its left - right difference changes sign in its
+    direction, at most once per candle.
+    """
+
+    def __init__(self, rules: List[AlertRule]):
+        self.rules = rules
+        self._by_interval: Dict[intervals_type, List[int]] = dict()
+        for index, rule in enumerate(rules):
+            self._by_interval.setdefault(rule.interval, list()).append(index)
+        self._differences = [math.nan] * len(rules)
+        self._fired_times = [0.0] * len(rules)
+
+    def evaluate(
+        self,
+        interval: intervals_type,
+        time: float,
+        value_of: Callable[[str], float],
+    ) -> List[event_type]:
+        """(rule, value, reference, direction) of the rules of `interval` that fired"""
+        events: List[event_type] = list()
+        for index in self._by_interval.get(interval, ()):
+            rule = self.rules[index]
+            value = value_of(rule.left)
+            reference = (
+                rule.factor * value_of(rule.right) if rule.right else rule.reference
+            )
+            difference = value - reference
+            previous, self._differences[index] = self._differences[index], difference
+            if math.isnan(difference) or math.isnan(previous):
+                continue
+            crossed = (
+                previous <= 0 < difference if rule.above else previous >= 0 > difference
+            )
+            if crossed and self._fired_times[index] != time:
+                self._fired_times[index] = time
+                events.append((index, value, reference, 1 if rule.above else -1))
+        return events
+
+    def operands(self, interval: intervals_type) -> List[str]:
+        """stat operands read by the rules of `interval`"""
+        operands = list()
+        for index in self._by_interval.get(interval, ()):
+            for operand in (self.rules[index].left, self.rules[index].right):
+                if operand and operand not in CANDLE_OPERANDS:
+                    operands.append(operand)
+        return operands
+
+    def reset(self, interval: intervals_type) -> None:
+        """forget the last differences of `interval`, after it was reopened"""
+        for index in self._by_interval.get(interval, ()):
+            self._differences[index] = math.nan
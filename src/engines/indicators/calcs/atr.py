@@ -3,7 +3,7 @@ import numpy as np
 from numba import njit
 
 
-@njit
+@njit(cache=True)
 def _atr_numba(
     highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int = 14
 ) -> float | Any:
@@ -17,3 +17,24 @@ def _atr_numba(
     for i in range(period + 1, len(highs)):
         atr = (atr * (period - 1) + tr[i]) / period
     return atr
+
+
+@njit(cache=True)
+def _atr_series_numba(
+    highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int = 14
+) -> np.ndarray:
+    """atr of every candle, computed causally like `_atr_numba` on each prefix"""
+    n = len(highs)
+    atr = np.full(n, np.nan, dtype=np.float64)
+    if n <= period:
+        return atr
+    tr = np.zeros(n)
+    for i in range(1, n):
+        hl = highs[i] - lows[i]
+        hc = abs(highs[i] - closes[i - 1])
+        lc = abs(lows[i] - closes[i - 1])
+        tr[i] = max(hl, hc, lc)
+    atr[period] = np.mean(tr[1 : period + 1])
+    for i in range(period + 1, n):
+        atr[i] = (atr[i - 1] * (period - 1) + tr[i]) / period
+    return atr
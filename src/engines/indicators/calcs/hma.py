@@ -2,7 +2,7 @@ from numba import njit
 import numpy as np
 
 
-@njit
+@njit(cache=True)
 def wma_kahan(values: np.ndarray) -> float:
     n = len(values)
     if n == 0:
@@ -18,7 +18,7 @@ def wma_kahan(values: np.ndarray) -> float:
     return sum_ / weight_sum
 
 
-@njit
+@njit(cache=True)
 def _hma_numba(prices: np.ndarray, period: int) -> float:
     length = len(prices)
     if length == 0:
@@ -43,3 +43,26 @@ def _hma_numba(prices: np.ndarray, period: int) -> float:
     # Step 4: HMA = WMA of last hma_period valid values
     hma_period = int(np.sqrt(period))
     return wma_kahan(diff[-hma_period:])
+
+
+@njit(cache=True)
+def _hma_series_numba(prices: np.ndarray, period: int) -> np.ndarray:
+    """hma of every candle, computed causally like `_hma_numba` on each prefix"""
+    length = len(prices)
+    hma = np.empty(length, dtype=np.float64)
+    if length == 0:
+        return hma
+
+    diff = np.empty(length, dtype=np.float64)
+    for i in range(length):
+        end = i + 1
+        start_half = max(0, end - (period // 2) - 1)
+        start_full = max(0, end - period)
+        diff[i] = 2.0 * wma_kahan(prices[start_half:end]) - wma_kahan(
+            prices[start_full:end]
+        )
+
+    hma_period = int(np.sqrt(period))
+    for i in range(length):
+        hma[i] = wma_kahan(diff[max(0, i + 1 - hma_period) : i + 1])
+    return hma
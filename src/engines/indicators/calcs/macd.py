@@ -2,7 +2,7 @@ import numpy as np
 from numba import njit
 
 
-@njit
+@njit(cache=True)
 def _ema_numba(values: np.ndarray, period: int) -> np.ndarray:
     ema = np.empty(len(values), dtype=np.float64)
     alpha = 2 / (period + 1)
@@ -12,7 +12,7 @@ def _ema_numba(values: np.ndarray, period: int) -> np.ndarray:
     return ema
 
 
-@njit
+@njit(cache=True)
 def _macd_numba(prices: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
     ema_fast = _ema_numba(prices, fast)
     ema_slow = _ema_numba(prices, slow)
@@ -20,3 +20,14 @@ def _macd_numba(prices: np.ndarray, fast: int = 12, slow: int = 26, signal: int
     signal_line = _ema_numba(macd_line, signal)
     histogram = macd_line - signal_line
     return macd_line[-1], signal_line[-1], histogram[-1]
+
+
+@njit(cache=True)
+def _macd_series_numba(
+    prices: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
+):
+    ema_fast = _ema_numba(prices, fast)
+    ema_slow = _ema_numba(prices, slow)
+    macd_line = ema_fast - ema_slow
+    signal_line = _ema_numba(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
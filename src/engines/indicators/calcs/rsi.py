@@ -4,7 +4,7 @@ from numba import njit
 from typing import Any, Union
 
 
-@njit
+@njit(cache=True)
 def _rsi_numba(prices: np.ndarray, period: int = 14) -> Union[float, Any]:
     n = prices.size
     deltas = np.empty(n - 1, dtype=prices.dtype)
@@ -26,3 +26,36 @@ def _rsi_numba(prices: np.ndarray, period: int = 14) -> Union[float, Any]:
 
     rs = avg_gain / avg_loss
     return 100 - (100 / (1 + rs))
+
+
+@njit(cache=True)
+def _rsi_series_numba(prices: np.ndarray, period: int = 14) -> np.ndarray:
+    """rsi of every candle, computed causally like `_rsi_numba` on each prefix"""
+    n = prices.size
+    rsi = np.full(n, np.nan, dtype=np.float64)
+    if n <= period:
+        return rsi
+
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(period):
+        delta = prices[i + 1] - prices[i]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+
+    for i in range(period, n):
+        if i > period:
+            delta = prices[i] - prices[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss == 0:
+            rsi[i] = 100.0
+        else:
+            rsi[i] = 100 - (100 / (1 + avg_gain / avg_loss))
+    return rsi
@@ -2,7 +2,7 @@ import numpy as np
 from numba import njit
 
 
-@njit
+@njit(cache=True)
 def simple_moving_average(arr, window):
     n = len(arr)
     if window > n:
@@ -24,7 +24,7 @@ def simple_moving_average(arr, window):
     return result
 
 
-@njit
+@njit(cache=True)
 def regression_slope(series, window):
     n = len(series)
     if window > n:
@@ -48,7 +48,7 @@ def regression_slope(series, window):
     return slopes
 
 
-@njit
+@njit(cache=True)
 def detect_slope_segments(slopes, tol=1e-6):
     """
     Groups slopes into segments where direction is consistent.
@@ -77,3 +77,32 @@ def detect_slope_segments(slopes, tol=1e-6):
     segments.append((start, len(slopes) - 1, avg_slope))
 
     return np.array(segments, dtype=np.float64)
+
+
+@njit(cache=True)
+def slope_segments_series(slopes, tol=1e-6):
+    """
+    Causal version of `detect_slope_segments`: for every slope returns the
+    average slope and the length of the segment it belongs to so far.
+    """
+    n = len(slopes)
+    averages = np.full(n, np.nan, dtype=np.float64)
+    lengths = np.zeros(n, dtype=np.float64)
+    if n == 0:
+        return averages, lengths
+
+    start = 0
+    current_slope = slopes[0]
+    total = 0.0
+    for i in range(n):
+        if i > 0 and (
+            (slopes[i] * current_slope < 0) or (abs(slopes[i] - current_slope) > tol)
+        ):
+            start = i
+            current_slope = slopes[i]
+            total = 0.0
+        total += slopes[i]
+        averages[i] = total / (i - start + 1)
+        lengths[i] = i - start + 1
+
+    return averages, lengths
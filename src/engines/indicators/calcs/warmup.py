@@ -0,0 +1,53 @@
+import time
+from typing import List
+
+import numpy as np
+
+from .atr import _atr_numba, _atr_series_numba
+from .hma import _hma_numba, _hma_series_numba
+from .macd import _macd_numba, _macd_series_numba
+from .rsi import _rsi_numba, _rsi_series_numba
+from .sma import (
+    detect_slope_segments,
+    regression_slope,
+    simple_moving_average,
+    slope_segments_series,
+)
+
+
+WARMUP_ROWS = 64
+
+
+def _warmup_arrays(compact: bool) -> List[np.ndarray]:
+    # shm columns are strided views (layout "A"), copies are contiguous (layout "C"),
+    # numba compiles a separate specialization for each of them and each dtype
+    dtypes = [np.float64, np.float32] if compact else [np.float64]
+    arrays = list()
+    for dtype in dtypes:
+        table = np.linspace(1.0, 2.0, WARMUP_ROWS * 3, dtype=dtype)
+        table = table.reshape(WARMUP_ROWS, 3)
+        arrays += [table[:, 0], np.ascontiguousarray(table[:, 0])]
+    return arrays
+
+
+def warmup_kernels(compact: bool = False) -> float:
+    """
+    compile (or load from the numba cache) every kernel signature the engine uses,
+    with `compact` also the float32 ones of the compact storage columns,
+    returns the elapsed seconds
+    """
+    start = time.perf_counter()
+    for prices in _warmup_arrays(compact):
+        _atr_numba(prices, prices, prices, 14)
+        _atr_series_numba(prices, prices, prices, 14)
+        _rsi_numba(prices, 14)
+        _rsi_series_numba(prices, 14)
+        _hma_numba(prices, 55)
+        _hma_series_numba(prices, 55)
+        _macd_numba(prices, 12, 26, 9)
+        _macd_series_numba(prices, 12, 26, 9)
+        simple_moving_average(prices, 14)
+        slopes = regression_slope(prices, 14)
+        detect_slope_segments(slopes, 1e-6)
+        slope_segments_series(slopes, 1e-6)
+    return time.perf_counter() - start
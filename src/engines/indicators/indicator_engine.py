@@ -1,20 +1,32 @@
 import asyncio
-from typing import Dict
-from fifi import (
-    BaseEngine,
-    MarketStatRepository,
-    MarketDataRepository,
-    log_exception,
-    LoggerFactory,
-)
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from fifi import BaseEngine, MarketStatRepository, log_exception, LoggerFactory
 from fifi.enums.market import MarketStat
 from fifi.enums import Market
 from fifi.types.market import intervals_type
 
-from ...common.settings import Settings
-from .calcs.rsi import _rsi_numba
-from .calcs.atr import _atr_numba
-from .calcs.hma import _hma_numba
+from ...common.settings import Settings, adopt_intervals
+from ...repository.shm.alert_event_repository import AlertEventRepository
+from ...repository.shm.candle_revision_repository import CandleRevisionRepository
+from ...repository.shm.handover_repository import (
+    HandoverRepository,
+    attach_as_writer,
+    detach,
+    layout_fingerprint,
+)
+from ...repository.shm.market_data_repository import MarketDataRepository
+from ...repository.shm.market_stat_history_repository import (
+    MarketStatHistoryRepository,
+)
+from ...types.stat import stat_type
+from ...utils.handover import claim
+from ...utils.intervals_channel import IntervalsChannel
+from ...utils.profiler import start_profiler
+from .alerts import CANDLE_OPERANDS, AlertEvaluator, parse_alert_rules
+from .calcs.warmup import warmup_kernels
+from .registry import Indicator, input_type, required_inputs, resolve_indicators
 
 LOGGER = LoggerFactory().get(__name__)
 
@@ -25,6 +37,11 @@ class IndicatorEngine(BaseEngine):
     name: str
     _repos: Dict[intervals_type, MarketStatRepository]
     _data_repos: Dict[intervals_type, MarketDataRepository]
+    _history_repos: Dict[intervals_type, MarketStatHistoryRepository]
+    _revision_repos: Dict[intervals_type, CandleRevisionRepository]
+    _revisions: Dict[intervals_type, int]
+    _indicators: Dict[intervals_type, List[Indicator]]
+    _inputs: Dict[intervals_type, List[input_type]]
 
     def __init__(
         self,
@@ -37,50 +54,321 @@ class IndicatorEngine(BaseEngine):
         self.settings = Settings()
         self._repos = dict()
         self._data_repos = dict()
+        self._history_repos = dict()
+        self._revision_repos = dict()
+        self._revisions = dict()
+        self._indicators = dict()
+        self._inputs = dict()
+        self.intervals_channel = IntervalsChannel()
+        self._target_intervals = list(self.settings.INTERVALS)
+        self._handover: Optional[HandoverRepository] = None
+        self.released = False
+        # rules are fixed for the life of the engine, their index is the event id
+        self.alerts = AlertEvaluator(parse_alert_rules(self.settings.ALERT_RULES))
+        self._alert_repo: Optional[AlertEventRepository] = None
+        self._values: Dict[str, float] = dict()
 
     @log_exception()
     async def prepare(self) -> None:
-        for interval in self.settings.INTERVALS:
-            self._repos[interval] = MarketStatRepository(
-                market=self.market, interval=interval, create=True
+        self.profiler = start_profiler(self.name)
+        compile_time = warmup_kernels(compact=self.settings.COMPACT_STORAGE)
+        LOGGER.info(f"{self.name}: kernels warmed up in {compile_time:.3f}s")
+        if self.settings.HANDOVER_ENABLED:
+            self._handover, takeover, _ = await claim(
+                name=self.name,
+                layout=self.layout(),
+                timeout=self.settings.HANDOVER_TIMEOUT,
             )
-            self._data_repos[interval] = MarketDataRepository(
-                market=self.market, interval=interval
+            if takeover and self.take_over():
+                return
+        self._alert_repo = AlertEventRepository(
+            market=self.market,
+            create=True,
+            capacity=self.settings.ALERT_EVENT_CAPACITY,
+        )
+        for interval in self._target_intervals:
+            try:
+                self.open_interval(interval)
+            except FileNotFoundError:
+                # the market is starting, opened by `apply_intervals` once it streams
+                LOGGER.info(f"{self.name}-{interval}: waiting for the market data")
+
+    def layout(self) -> float:
+        return layout_fingerprint(
+            self._target_intervals,
+            [self.settings.get_history_depth(i) for i in self._target_intervals],
+            self.settings.ALERT_EVENT_CAPACITY,
+        )
+
+    def take_over(self) -> bool:
+        """continue the live stat segments of the previous instance in place"""
+        try:
+            self._alert_repo = attach_as_writer(
+                AlertEventRepository(
+                    market=self.market, capacity=self.settings.ALERT_EVENT_CAPACITY
+                )
             )
+            for interval in self._target_intervals:
+                self.open_interval(interval, create=False)
+        except FileNotFoundError:
+            LOGGER.warning(f"{self.name}: segments are gone, recreating")
+            if self._alert_repo:
+                self._alert_repo.close()
+                self._alert_repo = None
+            for interval_repos in (
+                self._repos,
+                self._history_repos,
+                self._data_repos,
+                self._revision_repos,
+            ):
+                for repo in interval_repos.values():
+                    repo.close()
+                interval_repos.clear()
+            self._indicators.clear()
+            self._inputs.clear()
+            return False
+        LOGGER.warning(f"{self.name}: took over the live segments")
+        return True
+
+    def release(self) -> None:
+        """hand the stat segments over to the successor, without unlinking them"""
+        for interval in self._repos:
+            detach(self._repos[interval])
+            detach(self._history_repos[interval])
+            self._data_repos[interval].close()
+            self._revision_repos[interval].close()
+        detach(self._alert_repo)
+        self._handover.release(last_trade_time=0)
+        detach(self._handover)
+        self.released = True
+        LOGGER.warning(f"{self.name}: segments handed over")
+
+    def set_intervals(self, intervals: List[intervals_type]) -> None:
+        """called by the manager, the engine process opens/closes the changed intervals"""
+        self.intervals_channel.send(intervals)
+
+    def apply_intervals(self) -> List[intervals_type]:
+        """
+        close the removed intervals and open the added ones whose market data is
+        ready, the others are retried on the next tick; returns the opened ones
+        """
+        intervals = self.intervals_channel.receive()
+        if intervals is not None:
+            self._target_intervals = intervals
+            adopt_intervals(self.settings, intervals, self.settings.CONFIG_FILE)
+        for interval in list(self._repos):
+            if interval not in self._target_intervals:
+                self.close_interval(interval)
+        opened = list()
+        for interval in self._target_intervals:
+            if interval in self._repos:
+                continue
+            try:
+                self.open_interval(interval)
+                opened.append(interval)
+            except FileNotFoundError:
+                pass
+        if self._handover and intervals is not None:
+            self._handover.set_layout(self.layout())
+        return opened
+
+    def open_interval(self, interval: intervals_type, create: bool = True) -> None:
+        depth = self.settings.get_history_depth(interval)
+        # raises FileNotFoundError until the exchange worker created the segment
+        self._data_repos[interval] = MarketDataRepository(
+            market=self.market,
+            interval=interval,
+            rows=depth,
+            compact=self.settings.COMPACT_STORAGE,
+        )
+        self._revision_repos[interval] = CandleRevisionRepository(
+            market=self.market, interval=interval
+        )
+        self._revisions[interval] = self._revision_repos[interval].get_revision()
+        self._indicators[interval] = resolve_indicators(
+            self.settings.get_indicators(interval)
+        )
+        self._inputs[interval] = required_inputs(self._indicators[interval])
+        computed = [s.name for i in self._indicators[interval] for s in i.outputs]
+        for operand in self.alerts.operands(interval):
+            if operand not in computed:
+                LOGGER.warning(
+                    f"{self.name}-{interval}: {operand} of an alert rule isn't computed"
+                )
+        LOGGER.info(
+            f"{self.name}-{interval}: {[i.name for i in self._indicators[interval]]}"
+        )
+        repo = MarketStatRepository(
+            market=self.market, interval=interval, create=create, rows=depth
+        )
+        self._repos[interval] = repo if create else attach_as_writer(repo)
+        history = MarketStatHistoryRepository(
+            market=self.market, interval=interval, create=create, rows=depth
+        )
+        self._history_repos[interval] = history if create else attach_as_writer(history)
+        self.alerts.reset(interval)
+
+    def close_interval(self, interval: intervals_type) -> None:
+        repo = self._repos.pop(interval)
+        repo.health.clear_is_updated()
+        repo.close()
+        self._history_repos.pop(interval).close()
+        self._data_repos.pop(interval).close()
+        self._revision_repos.pop(interval).close()
+        self._revisions.pop(interval)
+        self._indicators.pop(interval)
+        self._inputs.pop(interval)
+        LOGGER.info(f"{self.name}-{interval}: closed")
 
     @log_exception()
     async def execute(self) -> None:
         LOGGER.info(f"{self.name} is executing...")
+        first_tick = True
         while True:
+            tick_start = time.perf_counter()
+            if self._handover:
+                self._handover.beat()
+                if self._handover.get_successor():
+                    self.release()
+                    return
+            opened = self.apply_intervals()
             for interval, repo in self._repos.items():
                 if self._data_repos[interval].get_time() > repo.get_time():
                     repo.create_candle()
                     repo.set_time(self._data_repos[interval].get_time())
-                for stat in MarketStat:
-                    value = self.get_calc_result(interval, stat)
-                    repo.set_last_stat(stat, value)
+                    self.finalize_history(interval)
+                if (
+                    self._revision_repos[interval].get_revision()
+                    != self._revisions[interval]
+                ):
+                    self.revise_history(interval)
+                # the stat update starts when its candle data is read
+                update_time = time.time()
+                inputs = self.get_inputs(interval)
+                self._values.clear()
+                for indicator in self._indicators[interval]:
+                    values = indicator.compute(inputs)
+                    for stat, value in zip(indicator.outputs, values):
+                        self.set_last_stat(interval, stat, value)
+                        self._values[stat.name] = value
+                self.check_alerts(interval, repo.get_time(), update_time)
+            if first_tick:
+                first_tick = False
+                LOGGER.info(
+                    f"{self.name}: first tick latency {time.perf_counter() - tick_start:.3f}s"
+                )
+                for repo in self._repos.values():
+                    repo.health.set_is_updated()
+            for interval in opened:
+                self._repos[interval].health.set_is_updated()
             await asyncio.sleep(0.1)
 
-    def get_calc_result(self, interval: intervals_type, stat: MarketStat):
+    def finalize_history(self, interval: intervals_type) -> None:
+        """
+        append the new candles to the stat history and write the final values
+        of the candles closed since the last call, aligned with the data rows
+        """
+        history = self._history_repos[interval]
+        times = self._data_repos[interval].get_times()
+        new_candles = int(np.count_nonzero(times > history.get_time()))
+        if new_candles == 0:
+            return
+        history.shift(new_candles)
+        tail = min(new_candles + 1, len(times), history.size)
+        history.set_tail(MarketStat.TIME, times[-tail:])
+        inputs = self.get_inputs(interval)
+        for indicator in self._indicators[interval]:
+            series = indicator.compute_series(inputs)
+            for stat, values in zip(indicator.outputs, series):
+                history.set_tail(stat, values[-tail:])
+
+    def revise_history(self, interval: intervals_type) -> None:
+        """recompute the stat history of the candles the exchange worker rewrote"""
+        revision = self._revision_repos[interval]
+        self._revisions[interval] = revision.get_revision()
+        times = self._data_repos[interval].get_times()
+        history = self._history_repos[interval]
+        tail = min(
+            int(np.count_nonzero(times >= revision.get_from_time())), history.size
+        )
+        if tail == 0:
+            return
+        inputs = self.get_inputs(interval)
+        for indicator in self._indicators[interval]:
+            series = indicator.compute_series(inputs)
+            for stat, values in zip(indicator.outputs, series):
+                history.set_tail(stat, values[-tail:])
+        LOGGER.info(f"{self.name}-{interval}: {tail} rewritten candles recomputed")
+
+    def check_alerts(
+        self, interval: intervals_type, candle_time: float, update_time: float
+    ) -> None:
+        """
+        evaluate the rules of `interval` on the stats just set, publish what fired;
+        `update_time` is the wall time the stat update read its candle data
+        """
+        repo = self._data_repos[interval]
+
+        def value_of(operand: str) -> float:
+            if operand in CANDLE_OPERANDS:
+                return float(getattr(repo, f"get_{operand.lower()}s")()[-1])
+            return float(self._values.get(operand, np.nan))
+
+        for rule, value, reference, direction in self.alerts.evaluate(
+            interval, candle_time, value_of
+        ):
+            seq = self._alert_repo.publish(
+                rule=rule,
+                time=candle_time,
+                value=value,
+                reference=reference,
+                direction=direction,
+                update_time=update_time,
+                emit_time=time.time(),
+            )
+            LOGGER.info(
+                f"{self.name}-{interval}: alert #{seq} {self.alerts.rules[rule].name} "
+                f"{value=:.6g} {reference=:.6g}"
+            )
+
+    def get_inputs(self, interval: intervals_type) -> Dict[input_type, np.ndarray]:
+        """read every input column once, shared by all indicators of the interval"""
         repo = self._data_repos[interval]
-        closes = repo.get_closes()
-        lows = repo.get_lows()
-        highs = repo.get_highs()
-        if stat == MarketStat.ATR14:
-            return _atr_numba(highs, lows, closes, 14)
-        if stat == MarketStat.ATR3:
-            return _atr_numba(highs, lows, closes, 3)
-        if stat == MarketStat.ATR5:
-            return _atr_numba(highs, lows, closes, 5)
-        elif stat == MarketStat.RSI14:
-            return round(_rsi_numba(closes, 14), 2)
-        elif stat == MarketStat.HMA:
-            return _hma_numba(closes, 55)
-        else:
-            return 0
+        inputs: Dict[input_type, np.ndarray] = dict()
+        for name in self._inputs[interval]:
+            if name == "close":
+                inputs[name] = repo.get_closes()
+            elif name == "open":
+                inputs[name] = repo.get_opens()
+            elif name == "high":
+                inputs[name] = repo.get_highs()
+            elif name == "low":
+                inputs[name] = repo.get_lows()
+            elif name == "vol":
+                inputs[name] = repo.get_vols()
+        return inputs
+
+    def set_last_stat(
+        self, interval: intervals_type, stat: stat_type, value: float
+    ) -> None:
+        if isinstance(stat, MarketStat):
+            self._repos[interval].set_last_stat(stat, value)
+        self._history_repos[interval].set_last_stat(stat, value)
 
     async def postpare(self):
+        self.profiler.stop()
+        if self.released:
+            return
+        if self._handover:
+            self._handover.close()
+        if self._alert_repo:
+            self._alert_repo.close()
         for interval, repo in self._repos.items():
+            repo.health.clear_is_updated()
+            repo.close()
+        for interval, repo in self._history_repos.items():
             repo.close()
         for interval, repo in self._data_repos.items():
             repo.close()
+        for interval, repo in self._revision_repos.items():
+            repo.close()
@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Literal, Sequence, Tuple
+
+import numpy as np
+from fifi.enums.market import MarketStat
+
+from ...enums.extra_stat import ExtraStat
+from ...types.stat import stat_type
+from .calcs.atr import _atr_numba, _atr_series_numba
+from .calcs.hma import _hma_numba, _hma_series_numba
+from .calcs.macd import _macd_numba, _macd_series_numba
+from .calcs.rsi import _rsi_numba, _rsi_series_numba
+from .calcs.sma import detect_slope_segments, regression_slope, slope_segments_series
+
+
+input_type = Literal["close", "open", "high", "low", "vol"]
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """
+    An indicator is a kernel plus its parameters and output slots.
+    `calc` returns the last value of every output, `calc_series` the per candle
+    values (aligned with the inputs) used for the stat history.
+    Both take the `inputs` columns in order followed by `params`.
+    """
+
+    name: str
+    inputs: Tuple[input_type, ...]
+    outputs: Tuple[stat_type, ...]
+    calc: Callable[..., Sequence[float]]
+    calc_series: Callable[..., Sequence[np.ndarray]]
+    params: Tuple = ()
+
+    def compute(self, inputs: Dict[input_type, np.ndarray]) -> Sequence[float]:
+        return self.calc(*(inputs[name] for name in self.inputs), *self.params)
+
+    def compute_series(
+        self, inputs: Dict[input_type, np.ndarray]
+    ) -> Sequence[np.ndarray]:
+        return self.calc_series(*(inputs[name] for name in self.inputs), *self.params)
+
+
+def _rsi(closes: np.ndarray, period: int) -> Tuple[float]:
+    return (round(_rsi_numba(closes, period), 2),)
+
+
+def _rsi_series(closes: np.ndarray, period: int) -> Tuple[np.ndarray]:
+    return (np.round(_rsi_series_numba(closes, period), 2),)
+
+
+def _atr(
+    highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int
+) -> Tuple[float]:
+    return (_atr_numba(highs, lows, closes, period),)
+
+
+def _atr_series(
+    highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int
+) -> Tuple[np.ndarray]:
+    return (_atr_series_numba(highs, lows, closes, period),)
+
+
+def _hma(closes: np.ndarray, period: int) -> Tuple[float]:
+    return (_hma_numba(closes, period),)
+
+
+def _hma_series(closes: np.ndarray, period: int) -> Tuple[np.ndarray]:
+    return (_hma_series_numba(closes, period),)
+
+
+def _slope(closes: np.ndarray, window: int, tol: float) -> Tuple[float, ...]:
+    slopes = regression_slope(closes, window)
+    if slopes is None:
+        return (np.nan, np.nan, 0.0)
+    start, end, avg_slope = detect_slope_segments(slopes, tol)[-1]
+    return (slopes[-1], avg_slope, end - start + 1)
+
+
+def _slope_series(
+    closes: np.ndarray, window: int, tol: float
+) -> Tuple[np.ndarray, ...]:
+    slopes = np.full(len(closes), np.nan, dtype=np.float64)
+    averages = np.full(len(closes), np.nan, dtype=np.float64)
+    lengths = np.zeros(len(closes), dtype=np.float64)
+    valid_slopes = regression_slope(closes, window)
+    if valid_slopes is not None:
+        slopes[window - 1 :] = valid_slopes
+        averages[window - 1 :], lengths[window - 1 :] = slope_segments_series(
+            valid_slopes, tol
+        )
+    return (slopes, averages, lengths)
+
+
+INDICATORS: Dict[str, Indicator] = {
+    indicator.name: indicator
+    for indicator in [
+        *[
+            Indicator(
+                name=f"RSI{period}",
+                inputs=("close",),
+                outputs=(MarketStat[f"RSI{period}"],),
+                calc=_rsi,
+                calc_series=_rsi_series,
+                params=(period,),
+            )
+            for period in (14, 7, 5, 3)
+        ],
+        *[
+            Indicator(
+                name=f"ATR{period}",
+                inputs=("high", "low", "close"),
+                outputs=(MarketStat[f"ATR{period}"],),
+                calc=_atr,
+                calc_series=_atr_series,
+                params=(period,),
+            )
+            for period in (14, 7, 5, 3)
+        ],
+        Indicator(
+            name="HMA",
+            inputs=("close",),
+            outputs=(MarketStat.HMA,),
+            calc=_hma,
+            calc_series=_hma_series,
+            params=(55,),
+        ),
+        Indicator(
+            name="MACD",
+            inputs=("close",),
+            outputs=(ExtraStat.MACD, ExtraStat.MACD_SIGNAL, ExtraStat.MACD_HIST),
+            calc=_macd_numba,
+            calc_series=_macd_series_numba,
+            params=(12, 26, 9),
+        ),
+        Indicator(
+            name="SLOPE",
+            inputs=("close",),
+            outputs=(
+                ExtraStat.SLOPE,
+                ExtraStat.SLOPE_SEGMENT,
+                ExtraStat.SLOPE_SEGMENT_LENGTH,
+            ),
+            calc=_slope,
+            calc_series=_slope_series,
+            params=(14, 1e-6),
+        ),
+    ]
+}
+
+
+def resolve_indicators(names: List[str]) -> List[Indicator]:
+    indicators: List[Indicator] = list()
+    slots: Dict[stat_type, str] = dict()
+    for name in names:
+        if name not in INDICATORS:
+            raise ValueError(f"There is no indicator={name} in the registry")
+        indicator = INDICATORS[name]
+        for stat in indicator.outputs:
+            if stat in slots:
+                raise ValueError(
+                    f"{name} and {slots[stat]} both write into {stat.name}"
+                )
+            slots[stat] = name
+        indicators.append(indicator)
+    return indicators
+
+
+def required_inputs(indicators: List[Indicator]) -> List[input_type]:
+    inputs: List[input_type] = list()
+    for indicator in indicators:
+        for name in indicator.inputs:
+            if name not in inputs:
+                inputs.append(name)
+    return inputs
@@ -1,15 +1,21 @@
+import os
 import signal
 import time
-from typing import Dict
+from typing import Dict, List, Optional
 
 from fifi import log_exception
 from fifi.helpers.get_logger import LoggerFactory
 from fifi.enums import Market
 
-from ..common.settings import Settings
+from ..common.settings import Settings, reload_settings
+from ..repository.shm.market_data_repository import MarketDataRepository
+from ..utils.profiler import start_profiler
 from .exchanges.exchange_worker_factory import create_exchange_worker
 from .exchanges.base import BaseExchangeWorker
 from .indicators.indicator_engine import IndicatorEngine
+from .gateway.gateway_engine import GatewayEngine
+from .cross_market.cross_market_engine import CrossMarketEngine
+from .archiver.archiver_engine import ArchiverEngine
 
 
 LOGGER = LoggerFactory().get("Manager")
@@ -27,36 +33,191 @@ class Manager:
     def __init__(self):
         self.exchange_workers: Dict[Market, BaseExchangeWorker] = dict()
         self.indactor_engines: Dict[Market, IndicatorEngine] = dict()
+        self.gateway_engine: Optional[GatewayEngine] = None
+        self.cross_market_engine: Optional[CrossMarketEngine] = None
+        self.archiver_engine: Optional[ArchiverEngine] = None
         self.settings = Settings()
+        self._config_mtime = self.config_mtime()
+        # markets started or resized by a reconfiguration, the cross market
+        # engine and the archiver restart once they stream
+        self._awaited_markets: List[Market] = list()
+        self._readers_outdated = False
 
     @log_exception()
     def start(self) -> None:
         LOGGER.info("starting exchange workers for markets.....")
         for market in self.settings.MARKETS:
-            self.exchange_workers[market] = create_exchange_worker(
-                exchange=self.settings.EXCHANGE,
-                market=market,
-            )
-            self.exchange_workers[market].ignite()
+            self.start_exchange_worker(market)
 
         LOGGER.info("starting indicator engines for markets.....")
         for market in self.settings.MARKETS:
-            self.indactor_engines[market] = IndicatorEngine(market=market)
-            self.indactor_engines[market].start()
+            self.start_indicator_engine(market)
+
+        self.start_readers()
 
         # Register handlers for SIGTERM (docker stop) and SIGINT (Ctrl+C)
         signal.signal(signal.SIGTERM, handle_signal)
         signal.signal(signal.SIGINT, handle_signal)
+        # after the engines are forked, so they don't inherit it
+        profiler = start_profiler("Manager")
         try:
             while not shutdown_flag:
-                time.sleep(5)
+                time.sleep(self.settings.CONFIG_WATCH_INTERVAL)
+                self.watch_config()
+                self.refresh_readers()
         except Exception as e:
             LOGGER.error(f"Error: {e}")
         finally:
+            self.stop_readers()
             LOGGER.info("stopping indicator engines....")
             for market, engine in self.indactor_engines.items():
                 engine.stop()
             LOGGER.info("stopping exchange workers...")
             for market, ex_worker in self.exchange_workers.items():
                 ex_worker.shutdown()
+            profiler.stop()
             LOGGER.info("Exited cleanly.")
+
+    def start_exchange_worker(self, market: Market, wait: bool = True) -> None:
+        """`wait` blocks until the backfill of the market is done"""
+        self.exchange_workers[market] = create_exchange_worker(
+            exchange=self.settings.EXCHANGE,
+            market=market,
+        )
+        if wait:
+            self.exchange_workers[market].ignite()
+        else:
+            self.exchange_workers[market].start()
+
+    def start_indicator_engine(self, market: Market) -> None:
+        self.indactor_engines[market] = IndicatorEngine(market=market)
+        self.indactor_engines[market].start()
+
+    def start_readers(self) -> None:
+        """engines reading every market, started after the markets are streaming"""
+        self.start_aggregators()
+
+        if self.settings.GATEWAY_ENABLED:
+            LOGGER.info("starting gateway.....")
+            self.gateway_engine = GatewayEngine()
+            self.gateway_engine.start()
+
+    def stop_readers(self) -> None:
+        if self.gateway_engine:
+            LOGGER.info("stopping gateway....")
+            self.gateway_engine.stop()
+            self.gateway_engine = None
+        self.stop_aggregators()
+
+    def start_aggregators(self) -> None:
+        """readers whose state spans the markets, restarted on a reconfiguration"""
+        if self.settings.CROSS_MARKET_ENABLED and len(self.settings.MARKETS) > 1:
+            LOGGER.info("starting cross market engine.....")
+            self.cross_market_engine = CrossMarketEngine()
+            self.cross_market_engine.start()
+
+        if self.settings.ARCHIVE_ENABLED:
+            LOGGER.info("starting archiver.....")
+            self.archiver_engine = ArchiverEngine()
+            self.archiver_engine.start()
+
+    def stop_aggregators(self) -> None:
+        if self.archiver_engine:
+            LOGGER.info("stopping archiver....")
+            self.archiver_engine.stop()
+            self.archiver_engine = None
+        if self.cross_market_engine:
+            LOGGER.info("stopping cross market engine....")
+            self.cross_market_engine.stop()
+            self.cross_market_engine = None
+
+    def config_mtime(self) -> float:
+        try:
+            return os.stat(self.settings.CONFIG_FILE).st_mtime
+        except OSError:
+            return 0
+
+    def watch_config(self) -> None:
+        """reconfigure the markets and intervals when the config file changes"""
+        mtime = self.config_mtime()
+        if mtime == self._config_mtime:
+            return
+        self._config_mtime = mtime
+        try:
+            settings = reload_settings(self.settings.CONFIG_FILE)
+        except Exception as e:
+            LOGGER.error(f"invalid config in {self.settings.CONFIG_FILE}: {e}")
+            return
+        if (
+            settings.MARKETS == self.settings.MARKETS
+            and settings.INTERVALS == self.settings.INTERVALS
+        ):
+            return
+        self.reconfigure(settings)
+
+    def reconfigure(self, settings: Settings) -> None:
+        """
+        start/stop only the changed markets and intervals, the other markets
+        keep streaming; the gateway serves the changes in place, the cross
+        market engine and the archiver are restarted once the changes stream
+        """
+        removed = [m for m in self.settings.MARKETS if m not in settings.MARKETS]
+        added = [m for m in settings.MARKETS if m not in self.settings.MARKETS]
+        intervals_changed = settings.INTERVALS != self.settings.INTERVALS
+        LOGGER.warning(
+            f"reconfiguring: {added=} {removed=} intervals={settings.INTERVALS}"
+        )
+        for market in removed:
+            LOGGER.info(f"stopping {market.value}....")
+            self.indactor_engines.pop(market).stop()
+            self.exchange_workers.pop(market).shutdown()
+        if intervals_changed:
+            for market in self.exchange_workers:
+                self.exchange_workers[market].set_intervals(settings.INTERVALS)
+                self.indactor_engines[market].set_intervals(settings.INTERVALS)
+        # new processes are forked with the reloaded environment
+        self.settings = settings
+        for market in added:
+            LOGGER.info(f"starting {market.value}....")
+            self.start_exchange_worker(market, wait=False)
+            self.start_indicator_engine(market)
+        if self.gateway_engine:
+            self.gateway_engine.set_topics(settings.MARKETS, settings.INTERVALS)
+        # every market backfills the added intervals
+        awaited = settings.MARKETS if intervals_changed else added
+        self._awaited_markets = [
+            m for m in settings.MARKETS if m in self._awaited_markets or m in awaited
+        ]
+        self._readers_outdated = True
+
+    def refresh_readers(self) -> None:
+        """
+        restart the cross market engine and the archiver on the new markets and
+        intervals once all of them are streaming
+        """
+        if not self._readers_outdated:
+            return
+        if not all(self.is_streaming(market) for market in self._awaited_markets):
+            return
+        self._awaited_markets.clear()
+        self._readers_outdated = False
+        self.stop_aggregators()
+        self.start_aggregators()
+
+    def is_streaming(self, market: Market) -> bool:
+        """every interval of `market` has its segment and is healthy"""
+        for interval in self.settings.INTERVALS:
+            try:
+                repo = MarketDataRepository(
+                    market=market,
+                    interval=interval,
+                    rows=self.settings.get_history_depth(interval),
+                    compact=self.settings.COMPACT_STORAGE,
+                )
+            except FileNotFoundError:
+                return False
+            healthy = repo.health.is_updated()
+            repo.close()
+            if not healthy:
+                return False
+        return True
@@ -0,0 +1,18 @@
+from enum import Enum
+
+
+class AlertEvent(Enum):
+    """columns of an alert event, the first row of the ring holds the head sequence"""
+
+    SEQ = 0
+    # index of the rule in ALERT_RULES
+    RULE = 1
+    # candle the event happened on
+    TIME = 2
+    VALUE = 3
+    REFERENCE = 4
+    # 1 crossed above, -1 crossed below
+    DIRECTION = 5
+    # wall time (s) the triggering stat update read its candle, and of the publication
+    UPDATE_TIME = 6
+    EMIT_TIME = 7
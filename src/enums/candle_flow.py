@@ -0,0 +1,20 @@
+from enum import Enum
+
+
+class CandleFlow(Enum):
+    """trade flow columns of a candle, the volume-at-price bins follow them"""
+
+    TIME = 0
+    VWAP = 1
+    NOTIONAL = 2
+    VOL = 3
+    TRADES = 4
+    PROFILE_LOW = 5
+    PROFILE_STEP = 6
+    # sum of the squared log returns between the trades of the candle
+    REALIZED_VAR = 7
+    LAST_PRICE = 8
+    # buyer minus seller volume
+    SIGNED_VOL = 9
+    LARGE_BUYS = 10
+    LARGE_SELLS = 11
@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class CandleRevision(Enum):
+    """last rewrite of the closed candles of an interval, e.g. by a re-sync"""
+
+    # incremented on every rewrite
+    REVISION = 0
+    # open time of the earliest rewritten candle
+    FROM_TIME = 1
@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class CrossStat(Enum):
+    """market x market matrices published by the cross market engine"""
+
+    CORRELATION = 0
+    COVARIANCE = 1
+    # beta of the row market against the column market
+    BETA = 2
+    # z-score of the log price spread row - column
+    SPREAD_ZSCORE = 3
@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class ExtraStat(Enum):
+    """stats that don't have a slot in `MarketStat`, kept in the stat history"""
+
+    MACD = 0
+    MACD_SIGNAL = 1
+    MACD_HIST = 2
+    SLOPE = 3
+    SLOPE_SEGMENT = 4
+    SLOPE_SEGMENT_LENGTH = 5
@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class HandoffStat(Enum):
+    """pressure of the hand-off buffer between the websocket and the interpreter"""
+
+    # batches waiting for the interpreter
+    DEPTH = 0
+    HIGH_WATER_MARK = 1
+    CAPACITY = 2
+    # batches dropped, trades coalesced into candle deltas, since the start
+    DROPPED = 3
+    COALESCED = 4
+    # wall time (s) of the last update
+    TIME = 5
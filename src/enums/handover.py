@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class Handover(Enum):
+    """handover record of a writer engine, shared by the owner and its successor"""
+
+    LAYOUT = 0
+    HEARTBEAT = 1
+    SUCCESSOR = 2
+    RELEASED = 3
+    LAST_TRADE_TIME = 4
+    # ids of the trades at LAST_TRADE_TIME that were applied, -1 if unknown
+    LAST_TIDS_COUNT = 5
+    LAST_TIDS = 6
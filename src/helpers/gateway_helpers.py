@@ -0,0 +1,33 @@
+from typing import Dict
+
+from fifi import MarketStatRepository
+from fifi.enums import Market
+from fifi.enums.market import MarketStat
+from fifi.types.market import intervals_type
+
+from ..repository.shm.market_data_repository import MarketDataRepository
+
+
+def to_topic(market: Market, interval: intervals_type) -> str:
+    return f"{market.value}:{interval}"
+
+
+def last_candle_to_dict(repo: MarketDataRepository) -> Dict[str, float]:
+    return {
+        "time": float(repo.get_time()),
+        "open": float(repo.get_opens()[-1]),
+        "high": float(repo.get_highs()[-1]),
+        "low": float(repo.get_lows()[-1]),
+        "close": float(repo.get_closes()[-1]),
+        "vol": float(repo.get_vols()[-1]),
+        "price": float(repo.get_last_trade()),
+        "seller_vol": float(repo.get_seller_vol()),
+        "buyer_vol": float(repo.get_buyer_vol()),
+        "unique_traders": float(repo.get_unique_traders()),
+        "buyer_count": float(repo.get_buyer_count()),
+        "seller_count": float(repo.get_seller_count()),
+    }
+
+
+def last_stats_to_dict(repo: MarketStatRepository) -> Dict[str, float]:
+    return {stat.name: float(repo.get_last_stat(stat)) for stat in MarketStat}
@@ -0,0 +1,146 @@
+import os
+import re
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import pandas as pd
+from fifi import LoggerFactory
+from fifi.enums import Market
+from fifi.types.market import intervals_type
+
+
+LOGGER = LoggerFactory().get(__name__)
+
+PART_PATTERN = re.compile(r"^part-(\d+)-(\d+)\.parquet$")
+
+
+def to_month(time: int) -> str:
+    return datetime.fromtimestamp(time / 1000, tz=timezone.utc).strftime("%Y-%m")
+
+
+class CandleArchive:
+    """
+    Columnar archive of the closed candles and their final stats.
+    Partitioned hive style, one directory per market, interval and month:
+        <directory>/market=<market>/interval=<interval>/month=<YYYY-MM>/part-<first>-<last>.parquet
+    Every appended batch is a new part named after its first and last candle
+    time, so a query opens only the parts overlapping its range. Parts are
+    written to a temporary file and renamed, readers never see a partial one;
+    a month with more than `compact_files` parts is merged into one.
+    """
+
+    def __init__(self, directory: str, compact_files: int = 32):
+        self.directory = directory
+        self.compact_files = compact_files
+
+    def _interval_dir(self, market: Market, interval: intervals_type) -> str:
+        return os.path.join(
+            self.directory, f"market={market.value}", f"interval={interval}"
+        )
+
+    def _parts(
+        self, market: Market, interval: intervals_type, month: Optional[str] = None
+    ) -> List[Tuple[int, int, str]]:
+        """(first time, last time, path) of the parts, by first time"""
+        interval_dir = self._interval_dir(market, interval)
+        if not os.path.isdir(interval_dir):
+            return list()
+        months = [f"month={month}"] if month else os.listdir(interval_dir)
+        parts = list()
+        for month_dir in months:
+            path = os.path.join(interval_dir, month_dir)
+            if not os.path.isdir(path):
+                continue
+            for name in os.listdir(path):
+                match = PART_PATTERN.match(name)
+                if match:
+                    first, last = int(match.group(1)), int(match.group(2))
+                    parts.append((first, last, os.path.join(path, name)))
+        return sorted(parts)
+
+    def last_time(self, market: Market, interval: intervals_type) -> int:
+        """time of the newest archived candle, 0 if there is none"""
+        return max((last for _, last, _ in self._parts(market, interval)), default=0)
+
+    def append(self, market: Market, interval: intervals_type, frame: pd.DataFrame):
+        """append closed candles, `frame` has a `time` column in ms"""
+        if frame.empty:
+            return
+        months = frame["time"].map(to_month)
+        for month, batch in frame.groupby(months, sort=True):
+            self._write(market, interval, month, batch)
+            if len(self._parts(market, interval, month)) > self.compact_files:
+                self.compact(market, interval, month)
+
+    def _write(
+        self,
+        market: Market,
+        interval: intervals_type,
+        month: str,
+        frame: pd.DataFrame,
+    ) -> None:
+        path = os.path.join(self._interval_dir(market, interval), f"month={month}")
+        os.makedirs(path, exist_ok=True)
+        first, last = int(frame["time"].iloc[0]), int(frame["time"].iloc[-1])
+        target = os.path.join(path, f"part-{first}-{last}.parquet")
+        temp = f"{target}.tmp"
+        frame.to_parquet(temp, index=False)
+        os.replace(temp, target)
+
+    def compact(self, market: Market, interval: intervals_type, month: str) -> None:
+        """merge the parts of a month into one"""
+        parts = self._parts(market, interval, month)
+        if len(parts) < 2:
+            return
+        frame = pd.concat(
+            [pd.read_parquet(path) for _, _, path in parts], ignore_index=True
+        )
+        frame = frame.drop_duplicates("time", keep="last").sort_values("time")
+        # the merged part is in place before the old ones go, a query in between
+        # reads some candles twice and drops the duplicates
+        self._write(market, interval, month, frame)
+        merged = os.path.join(
+            os.path.dirname(parts[0][2]),
+            f"part-{int(frame['time'].iloc[0])}-{int(frame['time'].iloc[-1])}.parquet",
+        )
+        for _, _, path in parts:
+            if path != merged:
+                os.remove(path)
+        LOGGER.info(f"{market.value}-{interval}-{month}: compacted {len(parts)} parts")
+
+    def query(
+        self,
+        market: Market,
+        interval: intervals_type,
+        start: int = 0,
+        end: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """candles with `start` <= time < `end` (ms), reading only the overlapping parts"""
+        end = end if end is not None else 2**62
+        if columns is not None and "time" not in columns:
+            columns = ["time", *columns]
+        frames = list()
+        for first, last, path in self._parts(market, interval):
+            if last < start or first >= end:
+                continue
+            try:
+                frames.append(
+                    pd.read_parquet(
+                        path,
+                        columns=columns,
+                        filters=[("time", ">=", start), ("time", "<", end)],
+                        memory_map=True,
+                    )
+                )
+            except FileNotFoundError:
+                # compacted meanwhile, the merged part is already listed
+                continue
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        frame = pd.concat(frames, ignore_index=True)
+        return (
+            frame.drop_duplicates("time", keep="last")
+            .sort_values("time")
+            .reset_index(drop=True)
+        )
@@ -0,0 +1,101 @@
+import time
+import numpy as np
+from typing import Optional, Tuple
+
+from fifi import LoggerFactory
+from fifi.enums import Market
+from fifi.repository.shm.shm_base_repository import SHMBaseRepository, check_reader
+
+from ...enums.alert_event import AlertEvent
+
+
+# readers waiting for events check the head this often, by default
+WAIT_POLL = 0.005
+
+
+class AlertEventRepository(SHMBaseRepository):
+    """
+    Ring of the alert events of a market, written by its indicator engine.
+    Every event gets the next sequence number; the event row is written
+    before the head sequence, so a reader never sees a partial event.
+    Readers keep the last sequence they consumed and `wait` for newer ones,
+    events overwritten before they were read are skipped; `poll_interval`
+    trades the wake up latency of `wait` for the polling cost.
+    """
+
+    def __init__(
+        self,
+        market: Market,
+        create: bool = False,
+        capacity: int = 1024,
+        poll_interval: float = WAIT_POLL,
+    ) -> None:
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        super().__init__(
+            name=f"alert_events_{market.value}",
+            rows=capacity + 1,
+            columns=AlertEvent.__len__(),
+            create=create,
+        )
+        self.LOGGER = LoggerFactory().get(self._name)
+        self._events = self._data[1:]
+
+    def get_head(self) -> int:
+        """sequence of the newest event, 0 before the first one"""
+        return int(self._data[0, AlertEvent.SEQ.value])
+
+    def read(self, after: int) -> Tuple[np.ndarray, int]:
+        """
+        copy of the events newer than sequence `after`, oldest first,
+        and the sequence to pass on the next call
+        """
+        head = self.get_head()
+        first = max(after, head - self.capacity) + 1
+        if first > head:
+            return np.empty((0, AlertEvent.__len__())), head
+        slots = np.arange(first - 1, head) % self.capacity
+        events = self._events[slots]
+        # drop the slots the writer reused before or while they were copied
+        expected = np.arange(first, head + 1)
+        valid = (events[:, AlertEvent.SEQ.value] == expected) & (
+            self._events[slots, AlertEvent.SEQ.value] == expected
+        )
+        return events[valid], head
+
+    def wait(
+        self, after: int, timeout: Optional[float] = None
+    ) -> Tuple[np.ndarray, int]:
+        """block until there are events newer than `after`, or `timeout` passed"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.get_head() <= after:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        return self.read(after)
+
+    @check_reader
+    def publish(
+        self,
+        rule: int,
+        time: float,
+        value: float,
+        reference: float,
+        direction: int,
+        update_time: float,
+        emit_time: float,
+    ) -> int:
+        seq = self.get_head() + 1
+        event = self._events[(seq - 1) % self.capacity]
+        # invalidate the slot while it's rewritten
+        event[AlertEvent.SEQ.value] = 0
+        event[AlertEvent.RULE.value] = rule
+        event[AlertEvent.TIME.value] = time
+        event[AlertEvent.VALUE.value] = value
+        event[AlertEvent.REFERENCE.value] = reference
+        event[AlertEvent.DIRECTION.value] = direction
+        event[AlertEvent.UPDATE_TIME.value] = update_time
+        event[AlertEvent.EMIT_TIME.value] = emit_time
+        event[AlertEvent.SEQ.value] = seq
+        self._data[0, AlertEvent.SEQ.value] = seq
+        return seq
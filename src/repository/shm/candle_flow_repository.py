@@ -0,0 +1,208 @@
+import math
+import numpy as np
+from typing import Optional
+
+from fifi import LoggerFactory
+from fifi.enums import Market
+from fifi.repository.shm.shm_base_repository import check_reader
+from fifi.types.market import intervals_type
+
+from ...enums.candle_flow import CandleFlow
+from .compact_shm_repository import CompactSHMRepository
+
+
+FIELDS = CandleFlow.__len__()
+
+
+class CandleFlowRepository(CompactSHMRepository):
+    """
+    VWAP, trade count, order flow and volume-at-price profile of every candle,
+    row aligned with `MarketDataRepository`. The order flow is the realized
+    volatility of the trades within the candle, the signed volume imbalance
+    and the count of large buys and sells. The profile has `bins` fixed bins of
+    `PROFILE_STEP` starting at `PROFILE_LOW`, centered on the candle open;
+    trades outside of it land in the edge bins.
+    With `compact=True` the trade counts and profile columns are float32; the
+    profile of the forming candle is summed in float64 by the writer and only
+    stored rounded, so small fills don't vanish in a large bin.
+    """
+
+    def __init__(
+        self,
+        market: Market,
+        interval: intervals_type,
+        bins: int,
+        create: bool = False,
+        rows: int = 200,
+        compact: bool = False,
+    ) -> None:
+        self.bins = bins
+        super().__init__(
+            name=f"candle_flow_{market.value}_{interval}",
+            rows=rows,
+            columns=FIELDS + bins,
+            # the vwap sums stay float64
+            compact_columns=[
+                CandleFlow.TRADES.value,
+                CandleFlow.LARGE_BUYS.value,
+                CandleFlow.LARGE_SELLS.value,
+                *range(FIELDS, FIELDS + bins),
+            ],
+            compact=compact,
+            create=create,
+        )
+        self._profile = self._span(FIELDS, FIELDS + bins)
+        # writer side sums of the last row, seeded from it for a take over
+        self._last_profile = self._profile[-1].astype(np.float64)
+        self.LOGGER = LoggerFactory().get(self._name)
+
+    def get_times(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(CandleFlow.TIME.value, _from, _to)
+
+    def get_vwaps(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(CandleFlow.VWAP.value, _from, _to)
+
+    def get_trade_counts(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(CandleFlow.TRADES.value, _from, _to)
+
+    def get_realized_vols(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return np.sqrt(self._column(CandleFlow.REALIZED_VAR.value, _from, _to))
+
+    def get_imbalances(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        """(buyer - seller volume) / volume, 0 without trades"""
+        signed = self._column(CandleFlow.SIGNED_VOL.value, _from, _to)
+        vol = self._column(CandleFlow.VOL.value, _from, _to)
+        return np.divide(signed, vol, out=np.zeros(len(vol)), where=vol > 0)
+
+    def get_large_buys(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(CandleFlow.LARGE_BUYS.value, _from, _to)
+
+    def get_large_sells(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(CandleFlow.LARGE_SELLS.value, _from, _to)
+
+    def get_time(self) -> float:
+        return self._fields[CandleFlow.TIME.value][-1]
+
+    def get_vwap(self) -> float:
+        return self._fields[CandleFlow.VWAP.value][-1]
+
+    def get_trade_count(self) -> float:
+        return self._fields[CandleFlow.TRADES.value][-1]
+
+    def get_realized_vol(self) -> float:
+        return math.sqrt(self._fields[CandleFlow.REALIZED_VAR.value][-1])
+
+    def get_imbalance(self) -> float:
+        vol = self._fields[CandleFlow.VOL.value][-1]
+        return self._fields[CandleFlow.SIGNED_VOL.value][-1] / vol if vol > 0 else 0
+
+    def get_profile(self, row: int = -1) -> np.ndarray:
+        return self._profile[row]
+
+    def get_profile_prices(self, row: int = -1) -> np.ndarray:
+        """lower edge price of every profile bin"""
+        low = self._fields[CandleFlow.PROFILE_LOW.value][row]
+        step = self._fields[CandleFlow.PROFILE_STEP.value][row]
+        return low + step * np.arange(self.bins)
+
+    @check_reader
+    def create_candle(self, time: float, open_price: float, step: float) -> None:
+        self.shift()
+        self.open_candle(time=time, open_price=open_price, step=step)
+
+    @check_reader
+    def open_candle(self, time: float, open_price: float, step: float) -> None:
+        """(re)center the last row on `open_price`, it must have no trades yet"""
+        self._fields[CandleFlow.TIME.value][-1] = time
+        self._fields[CandleFlow.PROFILE_LOW.value][-1] = (
+            open_price - step * self.bins / 2
+        )
+        self._fields[CandleFlow.PROFILE_STEP.value][-1] = step
+        # the first return of the candle is from its open
+        self._fields[CandleFlow.LAST_PRICE.value][-1] = open_price
+        self._last_profile[:] = self._profile[-1]
+
+    @check_reader
+    def add_trades(self, price: float, size: float, count: int = 1) -> None:
+        """`size` traded at `price`, `count` trades at once when coalesced"""
+        fields = self._fields
+        fields[CandleFlow.NOTIONAL.value][-1] += price * size
+        fields[CandleFlow.VOL.value][-1] += size
+        fields[CandleFlow.TRADES.value][-1] += count
+        vol = fields[CandleFlow.VOL.value][-1]
+        if vol > 0:
+            fields[CandleFlow.VWAP.value][-1] = (
+                fields[CandleFlow.NOTIONAL.value][-1] / vol
+            )
+        step = fields[CandleFlow.PROFILE_STEP.value][-1]
+        if step > 0:
+            index = int((price - fields[CandleFlow.PROFILE_LOW.value][-1]) // step)
+            index = min(max(index, 0), self.bins - 1)
+            self._last_profile[index] += size
+            self._profile[-1, index] = self._last_profile[index]
+
+    @check_reader
+    def add_order_flow(
+        self,
+        first_price: float,
+        last_price: float,
+        signed_vol: float,
+        realized_var: float = 0,
+        large_buys: int = 0,
+        large_sells: int = 0,
+    ) -> None:
+        """
+        trades from `first_price` to `last_price`, `realized_var` of the returns
+        between them when coalesced
+        """
+        fields = self._fields
+        previous = fields[CandleFlow.LAST_PRICE.value][-1]
+        if previous > 0:
+            realized_var += math.log(first_price / previous) ** 2
+        fields[CandleFlow.REALIZED_VAR.value][-1] += realized_var
+        fields[CandleFlow.LAST_PRICE.value][-1] = last_price
+        fields[CandleFlow.SIGNED_VOL.value][-1] += signed_vol
+        if large_buys:
+            fields[CandleFlow.LARGE_BUYS.value][-1] += large_buys
+        if large_sells:
+            fields[CandleFlow.LARGE_SELLS.value][-1] += large_sells
+
+    @check_reader
+    def set_trade_count(self, count: float, row: int = -1) -> None:
+        self._fields[CandleFlow.TRADES.value][row] = count
+
+    @check_reader
+    def reset_candle(self, row: int, trades: float, close: float) -> None:
+        """
+        clear the flow of a candle rewritten from a snapshot, which only has its
+        trade count; later trades of the candle continue from `close`
+        """
+        for field in (
+            CandleFlow.VWAP,
+            CandleFlow.NOTIONAL,
+            CandleFlow.VOL,
+            CandleFlow.REALIZED_VAR,
+            CandleFlow.SIGNED_VOL,
+            CandleFlow.LARGE_BUYS,
+            CandleFlow.LARGE_SELLS,
+        ):
+            self._fields[field.value][row] = 0
+        self._profile[row] = 0
+        if row in (-1, self._rows - 1):
+            self._last_profile[:] = 0
+        self._fields[CandleFlow.TRADES.value][row] = trades
+        self._fields[CandleFlow.LAST_PRICE.value][row] = close
@@ -0,0 +1,41 @@
+from fifi import LoggerFactory
+from fifi.enums import Market
+from fifi.repository.shm.shm_base_repository import SHMBaseRepository, check_reader
+from fifi.types.market import intervals_type
+
+from ...enums.candle_revision import CandleRevision
+
+
+class CandleRevisionRepository(SHMBaseRepository):
+    """
+    Revision of the candles of `MarketDataRepository`, written by the exchange
+    worker when it rewrites candles in place. Readers that derive values from
+    the candles (the stat history) recompute them from `FROM_TIME` when the
+    revision changes. `FROM_TIME` is written before the revision.
+    """
+
+    def __init__(
+        self,
+        market: Market,
+        interval: intervals_type,
+        create: bool = False,
+    ) -> None:
+        super().__init__(
+            name=f"candle_revision_{market.value}_{interval}",
+            rows=1,
+            columns=CandleRevision.__len__(),
+            create=create,
+        )
+        self.LOGGER = LoggerFactory().get(self._name)
+
+    def get_revision(self) -> int:
+        return int(self._data[0, CandleRevision.REVISION.value])
+
+    def get_from_time(self) -> float:
+        return self._data[0, CandleRevision.FROM_TIME.value]
+
+    @check_reader
+    def revise(self, from_time: float) -> None:
+        """the candles opened at `from_time` and after were rewritten"""
+        self._data[0, CandleRevision.FROM_TIME.value] = from_time
+        self._data[0, CandleRevision.REVISION.value] += 1
@@ -0,0 +1,96 @@
+import numpy as np
+from typing import List, Optional, Sequence
+
+from fifi.repository.shm.shm_base_repository import SHMBaseRepository, check_reader
+
+
+class CompactSHMRepository(SHMBaseRepository):
+    """
+    SHM repository whose volume and count columns can be stored as float32.
+    The default layout is the usual rows x columns float64 matrix. The compact
+    layout holds two row-major blocks in the same segment: the float64 columns
+    followed by the `compact_columns` as float32, so the price columns read by
+    the kernels stride over fewer bytes and the segment is smaller.
+    Columns are accessed through `_fields`, one view per column in either layout.
+    """
+
+    _wide: np.ndarray
+    _narrow: np.ndarray
+    _blocks: List[np.ndarray]
+    _positions: List[int]
+    _fields: List[np.ndarray]
+
+    def __init__(
+        self,
+        name: str,
+        rows: int,
+        columns: int,
+        compact_columns: Sequence[int],
+        compact: bool = False,
+        create: bool = False,
+    ) -> None:
+        self.compact = compact
+        narrow = [c for c in range(columns) if compact and c in compact_columns]
+        wide = [c for c in range(columns) if c not in narrow]
+        # the base repository sizes the segment in float64 columns
+        super().__init__(
+            name=name,
+            rows=rows,
+            columns=len(wide) + (len(narrow) + 1) // 2,
+            create=create,
+        )
+        self._wide = np.ndarray(
+            shape=(rows, len(wide)), dtype=np.float64, buffer=self._sm.buf
+        )
+        self._narrow = np.ndarray(
+            shape=(rows, len(narrow)),
+            dtype=np.float32,
+            buffer=self._sm.buf,
+            offset=self._wide.nbytes,
+        )
+        self._blocks = [self._wide] * columns
+        self._positions = [0] * columns
+        for i, column in enumerate(wide):
+            self._positions[column] = i
+        for i, column in enumerate(narrow):
+            self._blocks[column] = self._narrow
+            self._positions[column] = i
+        self._fields = [block[:, i] for block, i in zip(self._blocks, self._positions)]
+
+    def _column(
+        self, column: int, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        data = self._fields[column]
+        if _from and _to:
+            data = data[_from:_to]
+        elif _from:
+            data = data[_from:]
+        elif _to:
+            data = data[:_to]
+        return data
+
+    def _span(self, start: int, stop: int) -> np.ndarray:
+        """2D view of the columns [start, stop), they must share a block"""
+        first = self._positions[start]
+        return self._blocks[start][:, first : first + stop - start]
+
+    def extract_data(self, _from: Optional[int] = None, _to: Optional[int] = None):
+        if not self.compact:
+            return super().extract_data(_from, _to)
+        # a float64 copy in the default layout, the hot paths read `_fields`
+        return np.stack(
+            [self._column(c, _from, _to) for c in range(len(self._fields))], axis=1
+        ).astype(np.float64)
+
+    @check_reader
+    def shift(self, count: int = 1) -> None:
+        """move the rows `count` up, the new last rows are zero"""
+        if count <= 0:
+            return
+        count = min(count, self._rows)
+        for block in (self._wide, self._narrow):
+            block[: self._rows - count] = block[count:]
+            block[self._rows - count :] = 0
+
+    def new_row(self) -> None:
+        self.shift()
@@ -0,0 +1,52 @@
+import numpy as np
+from typing import List
+
+from fifi import LoggerFactory
+from fifi.enums import Market
+from fifi.repository.shm.shm_base_repository import SHMBaseRepository, check_reader
+from fifi.types.market import intervals_type
+
+from ...enums.cross_stat import CrossStat
+
+
+class CrossMarketStatRepository(SHMBaseRepository):
+    """
+    Market x market matrices of every `CrossStat` for one interval.
+    Rows and columns follow the order of `markets`, readers have to use the
+    same markets configuration as the service. The last row holds the time of
+    the candle the matrices belong to.
+    """
+
+    def __init__(
+        self,
+        markets: List[Market],
+        interval: intervals_type,
+        create: bool = False,
+    ) -> None:
+        self.markets = markets
+        self._index = {market: i for i, market in enumerate(markets)}
+        self._size = len(markets)
+        super().__init__(
+            name=f"cross_market_stat_{interval}",
+            rows=CrossStat.__len__() * self._size + 1,
+            columns=self._size,
+            create=create,
+        )
+        self.LOGGER = LoggerFactory().get(self._name)
+        self._matrices = self._data[:-1].reshape(
+            CrossStat.__len__(), self._size, self._size
+        )
+
+    def get_matrix(self, stat: CrossStat) -> np.ndarray:
+        return self._matrices[stat.value]
+
+    def get_stat(self, stat: CrossStat, market: Market, against: Market) -> float:
+        return self._matrices[stat.value, self._index[market], self._index[against]]
+
+    def get_time(self) -> float:
+        return self._data[-1, 0]
+
+    @check_reader
+    def set_matrices(self, matrices: np.ndarray, time: float) -> None:
+        self._matrices[:] = matrices
+        self._data[-1, 0] = time
@@ -0,0 +1,35 @@
+import time
+from fifi import LoggerFactory
+from fifi.enums import Market
+from fifi.repository.shm.shm_base_repository import SHMBaseRepository, check_reader
+
+from ...enums.handoff_stat import HandoffStat
+from ...utils.handoff_buffer import HandoffBuffer
+
+
+class HandoffStatsRepository(SHMBaseRepository):
+    """
+    Hand-off buffer counters of a market, published by its exchange worker
+    every heartbeat, so the buffer pressure is visible before data is dropped.
+    """
+
+    def __init__(self, market: Market, create: bool = False) -> None:
+        super().__init__(
+            name=f"handoff_stats_{market.value}",
+            rows=1,
+            columns=HandoffStat.__len__(),
+            create=create,
+        )
+        self.LOGGER = LoggerFactory().get(self._name)
+
+    def get_stat(self, stat: HandoffStat) -> float:
+        return self._data[0, stat.value]
+
+    @check_reader
+    def publish(self, buffer: HandoffBuffer) -> None:
+        self._data[0, HandoffStat.DEPTH.value] = buffer.depth
+        self._data[0, HandoffStat.HIGH_WATER_MARK.value] = buffer.high_water_mark
+        self._data[0, HandoffStat.CAPACITY.value] = buffer.capacity
+        self._data[0, HandoffStat.DROPPED.value] = buffer.dropped
+        self._data[0, HandoffStat.COALESCED.value] = buffer.coalesced
+        self._data[0, HandoffStat.TIME.value] = time.time()
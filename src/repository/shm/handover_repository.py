@@ -0,0 +1,113 @@
+import time
+import zlib
+import numpy as np
+from multiprocessing.resource_tracker import register, unregister
+from sys import version_info
+from typing import Optional, Sequence
+
+from fifi import LoggerFactory
+from fifi.repository.shm.shm_base_repository import SHMBaseRepository
+
+from ...enums.handover import Handover
+
+
+# bump when the column layout of a segment changes, so no successor attaches to it
+LAYOUT_VERSION = 4
+# trade ids of the last millisecond a release can carry, from LAST_TIDS on
+RELEASED_TIDS = 64
+
+
+def layout_fingerprint(*layout) -> float:
+    """exact float64 fingerprint of everything that shapes the segments of an engine"""
+    return float(zlib.crc32(repr((LAYOUT_VERSION, *layout)).encode()))
+
+
+def attach_as_writer(repo: SHMBaseRepository) -> SHMBaseRepository:
+    """take over writing into a segment attached with `create=False`"""
+    for segment in (repo, repo.health) if repo.health else (repo,):
+        segment._reader = False
+        # `connect` doesn't track attached segments, track it as if created here
+        if version_info.minor >= 13:
+            segment._sm._track = True
+        register(segment._sm._name, "shared_memory")
+    return repo
+
+
+def detach(repo: SHMBaseRepository) -> None:
+    """close a segment without unlinking it, readers and the successor keep it"""
+    for segment in (repo, repo.health) if repo.health else (repo,):
+        if not segment._reader:
+            unregister(segment._sm._name, "shared_memory")
+        segment._sm.close()
+
+
+class HandoverRepository(SHMBaseRepository):
+    """
+    Handover record of a writer engine. The owner beats while it writes; a
+    successor requests the handover, the owner then detaches its segments and
+    releases them with the time of the last trade it applied and the ids of
+    the trades of that millisecond, so the successor only skips those.
+    Both open the record as writers.
+    """
+
+    def __init__(self, name: str, create: bool = False) -> None:
+        super().__init__(
+            name=f"handover_{name}",
+            rows=1,
+            columns=Handover.LAST_TIDS.value + RELEASED_TIDS,
+            create=create,
+        )
+        self.LOGGER = LoggerFactory().get(self._name)
+
+    def get_layout(self) -> float:
+        return self._data[0, Handover.LAYOUT.value]
+
+    def set_layout(self, layout: float) -> None:
+        self._data[0, Handover.LAYOUT.value] = layout
+
+    def beat(self) -> None:
+        self._data[0, Handover.HEARTBEAT.value] = time.time()
+
+    def is_alive(self, timeout: float) -> bool:
+        return time.time() - self._data[0, Handover.HEARTBEAT.value] < timeout
+
+    def get_successor(self) -> float:
+        return self._data[0, Handover.SUCCESSOR.value]
+
+    def request(self, token: float) -> None:
+        self._data[0, Handover.RELEASED.value] = 0
+        self._data[0, Handover.SUCCESSOR.value] = token
+
+    def release(
+        self, last_trade_time: float, last_tids: Optional[Sequence[int]] = ()
+    ) -> None:
+        """`last_tids` None or longer than RELEASED_TIDS: the ids are unknown"""
+        if last_tids is None or len(last_tids) > RELEASED_TIDS:
+            self._data[0, Handover.LAST_TIDS_COUNT.value] = -1
+        else:
+            # trade ids are below 2**53, exact in float64
+            first = Handover.LAST_TIDS.value
+            self._data[0, first : first + len(last_tids)] = last_tids
+            self._data[0, Handover.LAST_TIDS_COUNT.value] = len(last_tids)
+        self._data[0, Handover.LAST_TRADE_TIME.value] = last_trade_time
+        self._data[0, Handover.RELEASED.value] = 1
+
+    def is_released(self) -> bool:
+        return bool(self._data[0, Handover.RELEASED.value])
+
+    def get_last_trade_time(self) -> float:
+        return self._data[0, Handover.LAST_TRADE_TIME.value]
+
+    def get_last_tids(self) -> Optional[np.ndarray]:
+        """ids of the released trades at the last trade time, None if unknown"""
+        count = int(self._data[0, Handover.LAST_TIDS_COUNT.value])
+        if count < 0:
+            return None
+        first = Handover.LAST_TIDS.value
+        return self._data[0, first : first + count].astype(np.int64)
+
+    def take_ownership(self, layout: float) -> None:
+        self._data[0, Handover.LAYOUT.value] = layout
+        self._data[0, Handover.SUCCESSOR.value] = 0
+        self._data[0, Handover.RELEASED.value] = 0
+        self.beat()
@@ -0,0 +1,195 @@
+import numpy as np
+from typing import Optional
+
+from fifi import LoggerFactory
+from fifi.enums import Market
+from fifi.enums.market import MarketData
+from fifi.repository.shm.health_data_repository import HealthDataRepository
+from fifi.repository.shm.shm_base_repository import check_reader
+from fifi.types.market import intervals_type
+
+from .compact_shm_repository import CompactSHMRepository
+
+
+# stored as float32 in the compact layout; prices, times and the volumes, which
+# are summed trade by trade, stay float64 (small fills vanish in a float32 sum)
+COMPACT_FIELDS = (
+    MarketData.UNIQUE_TRADERS,
+    MarketData.BUYER_COUNT,
+    MarketData.SELLER_COUNT,
+)
+
+
+class MarketDataRepository(CompactSHMRepository):
+    """
+    `fifi` market data repository with row level access, used to re-sync
+    candles in place, and an optional compact layout.
+    The default layout is the `fifi` one, readers can keep using the `fifi`
+    repository. With `compact=True` the count columns are float32,
+    every reader has to use this repository with the same `rows` and `compact`.
+    """
+
+    def __init__(
+        self,
+        market: Market,
+        interval: intervals_type,
+        create: bool = False,
+        rows: int = 200,
+        compact: bool = False,
+    ) -> None:
+        super().__init__(
+            name=f"market_data_{market.value}_{interval}",
+            rows=rows,
+            columns=MarketData.__len__(),
+            compact_columns=[field.value for field in COMPACT_FIELDS],
+            compact=compact,
+            create=create,
+        )
+        self._health_name = f"market_data_health_{market.value}_{interval}"
+        self.health = HealthDataRepository(name=self._health_name, create=create)
+        self.LOGGER = LoggerFactory().get(self._name)
+
+    def get_closes(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(MarketData.CLOSE.value, _from, _to)
+
+    def get_highs(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(MarketData.HIGH.value, _from, _to)
+
+    def get_lows(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(MarketData.LOW.value, _from, _to)
+
+    def get_opens(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(MarketData.OPEN.value, _from, _to)
+
+    def get_vols(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(MarketData.VOL.value, _from, _to)
+
+    def get_times(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self._column(MarketData.TIME.value, _from, _to)
+
+    def get_last_trade(self) -> float:
+        return self._fields[MarketData.PRICE.value][-1]
+
+    def get_time(self) -> float:
+        return self._fields[MarketData.TIME.value][-1]
+
+    def get_seller_vol(self) -> float:
+        return self._fields[MarketData.SELLER_VOL.value][-1]
+
+    def get_buyer_vol(self) -> float:
+        return self._fields[MarketData.BUYER_VOL.value][-1]
+
+    def get_unique_traders(self) -> float:
+        return self._fields[MarketData.UNIQUE_TRADERS.value][-1]
+
+    def get_buyer_count(self) -> float:
+        return self._fields[MarketData.BUYER_COUNT.value][-1]
+
+    def get_seller_count(self) -> float:
+        return self._fields[MarketData.SELLER_COUNT.value][-1]
+
+    def find_candle(self, time: float) -> Optional[int]:
+        """negative row index of the candle opened at `time`, if it's in the window"""
+        rows = np.flatnonzero(self._fields[MarketData.TIME.value] == time)
+        if rows.size == 0:
+            return None
+        return int(rows[-1]) - self._rows
+
+    @check_reader
+    def create_candle(self) -> None:
+        last_trade = self.get_last_trade()
+        self.shift()
+        # not coming the bad price into last trade
+        self._fields[MarketData.PRICE.value][-1] = last_trade
+
+    @check_reader
+    def set_candle(
+        self,
+        row: int,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        vol: float,
+    ) -> None:
+        """
+        rewrite the OHLCV of `row` from a candle snapshot; the buyer/seller
+        volumes and counts and the unique traders aren't in it and are zeroed
+        """
+        self._fields[MarketData.OPEN.value][row] = open
+        self._fields[MarketData.HIGH.value][row] = high
+        self._fields[MarketData.LOW.value][row] = low
+        self._fields[MarketData.CLOSE.value][row] = close
+        self._fields[MarketData.VOL.value][row] = vol
+        for field in (
+            MarketData.SELLER_VOL,
+            MarketData.BUYER_VOL,
+            MarketData.UNIQUE_TRADERS,
+            MarketData.BUYER_COUNT,
+            MarketData.SELLER_COUNT,
+        ):
+            self._fields[field.value][row] = 0
+
+    @check_reader
+    def set_close_price(self, price: float) -> None:
+        self._fields[MarketData.CLOSE.value][-1] = price
+
+    @check_reader
+    def set_open_price(self, price: float) -> None:
+        self._fields[MarketData.OPEN.value][-1] = price
+
+    @check_reader
+    def set_low_price(self, price: float) -> None:
+        self._fields[MarketData.LOW.value][-1] = price
+
+    @check_reader
+    def set_high_price(self, price: float) -> None:
+        self._fields[MarketData.HIGH.value][-1] = price
+
+    @check_reader
+    def set_last_trade(self, price: float) -> None:
+        self._fields[MarketData.PRICE.value][-1] = price
+
+    @check_reader
+    def set_vol(self, vol: float) -> None:
+        self._fields[MarketData.VOL.value][-1] = vol
+
+    @check_reader
+    def add_vol(self, vol: float) -> None:
+        self._fields[MarketData.VOL.value][-1] += vol
+
+    @check_reader
+    def add_seller_vol(self, vol: float) -> None:
+        self._fields[MarketData.SELLER_VOL.value][-1] += vol
+
+    @check_reader
+    def add_buyer_vol(self, vol: float) -> None:
+        self._fields[MarketData.BUYER_VOL.value][-1] += vol
+
+    @check_reader
+    def add_unique_traders(self, count: int) -> None:
+        self._fields[MarketData.UNIQUE_TRADERS.value][-1] += count
+
+    @check_reader
+    def add_buyer_count(self, count: int) -> None:
+        self._fields[MarketData.BUYER_COUNT.value][-1] += count
+
+    @check_reader
+    def add_seller_count(self, count: int) -> None:
+        self._fields[MarketData.SELLER_COUNT.value][-1] += count
+
+    @check_reader
+    def set_time(self, time: float) -> None:
+        self._fields[MarketData.TIME.value][-1] = time
@@ -0,0 +1,80 @@
+import numpy as np
+from typing import Optional
+
+from fifi import LoggerFactory
+from fifi.enums import Market
+from fifi.enums.market import MarketStat
+from fifi.repository.shm.shm_base_repository import SHMBaseRepository, check_reader
+from fifi.types.market import intervals_type
+
+from ...enums.extra_stat import ExtraStat
+from ...types.stat import stat_type
+
+
+class MarketStatHistoryRepository(SHMBaseRepository):
+    """
+    Per candle history of the market stats, aligned with the rows of
+    `MarketDataRepository`. The segment is stored stat-major, so the history
+    of every stat is a contiguous array. Closed candles are final, the last
+    slot holds the value of the forming candle.
+    `ExtraStat` slots are laid out after the `MarketStat` ones.
+    """
+
+    def __init__(
+        self,
+        market: Market,
+        interval: intervals_type,
+        create: bool = False,
+        rows: int = 200,
+    ) -> None:
+        super().__init__(
+            name=f"market_stat_history_{market.value}_{interval}",
+            rows=MarketStat.__len__() + ExtraStat.__len__(),
+            columns=rows,
+            create=create,
+        )
+        self.LOGGER = LoggerFactory().get(self._name)
+
+    @property
+    def size(self) -> int:
+        return self._columns
+
+    @staticmethod
+    def _slot(stat: stat_type) -> int:
+        if isinstance(stat, ExtraStat):
+            return MarketStat.__len__() + stat.value
+        return stat.value
+
+    def get_stat(
+        self,
+        stat: stat_type,
+        _from: Optional[int] = None,
+        _to: Optional[int] = None,
+    ) -> np.ndarray:
+        return self._data[self._slot(stat), _from:_to]
+
+    def get_last_stat(self, stat: stat_type) -> float:
+        return self._data[self._slot(stat), -1]
+
+    def get_times(
+        self, _from: Optional[int] = None, _to: Optional[int] = None
+    ) -> np.ndarray:
+        return self.get_stat(MarketStat.TIME, _from, _to)
+
+    def get_time(self) -> float:
+        return self._data[MarketStat.TIME.value, -1]
+
+    @check_reader
+    def shift(self, count: int) -> None:
+        """drop the `count` oldest candles and open `count` empty ones"""
+        count = min(count, self._columns)
+        self._data[:, : self._columns - count] = self._data[:, count:]
+        self._data[:, self._columns - count :] = 0
+
+    @check_reader
+    def set_tail(self, stat: stat_type, values: np.ndarray) -> None:
+        self._data[self._slot(stat), self._columns - len(values) :] = values
+
+    @check_reader
+    def set_last_stat(self, stat: stat_type, value: float) -> None:
+        self._data[self._slot(stat), -1] = value
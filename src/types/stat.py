@@ -0,0 +1,7 @@
+from typing import Union
+
+from fifi.enums.market import MarketStat
+
+from ..enums.extra_stat import ExtraStat
+
+stat_type = Union[MarketStat, ExtraStat]
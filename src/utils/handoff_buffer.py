@@ -0,0 +1,190 @@
+import math
+import threading
+from typing import Any, Dict, Iterator, List, Literal, Optional, Set
+
+
+overflow_policy_type = Literal["block", "drop_oldest", "coalesce"]
+
+DELTA_BUCKET = 60 * 1000
+
+
+class CandleDelta:
+    """aggregate of the trades of one minute, applied at once to every interval"""
+
+    __slots__ = (
+        "time",
+        "last_time",
+        "open",
+        "high",
+        "low",
+        "close",
+        "vol",
+        "notional",
+        "buyer_vol",
+        "seller_vol",
+        "trades",
+        "realized_var",
+        "large_buys",
+        "large_sells",
+        "tids",
+        "users",
+        "buyers",
+        "sellers",
+    )
+
+    def __init__(self, trade: Dict):
+        price = float(trade["px"])
+        self.time = trade["time"]
+        self.last_time = trade["time"]
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+        self.vol = 0.0
+        self.notional = 0.0
+        self.buyer_vol = 0.0
+        self.seller_vol = 0.0
+        self.trades = 0
+        # squared log returns between the trades, from the first one
+        self.realized_var = 0.0
+        self.large_buys = 0
+        self.large_sells = 0
+        # checked against the recent trade ids by the consumer
+        self.tids: List[int] = list()
+        self.users: Set[str] = set()
+        self.buyers: Set[str] = set()
+        self.sellers: Set[str] = set()
+
+    def add(self, trade: Dict, large_notional: float = math.inf) -> None:
+        price = float(trade["px"])
+        size = float(trade["sz"])
+        self.last_time = max(self.last_time, trade["time"])
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.realized_var += math.log(price / self.close) ** 2
+        self.close = price
+        self.vol += size
+        self.notional += price * size
+        large = price * size >= large_notional
+        if trade["side"] == "B":
+            self.buyer_vol += size
+            self.buyers.add(trade["users"][0])
+            self.large_buys += large
+        else:
+            self.seller_vol += size
+            self.sellers.add(trade["users"][1])
+            self.large_sells += large
+        self.users.update(trade["users"])
+        self.tids.append(trade["tid"])
+        self.trades += 1
+
+
+class CandleDeltas:
+    """trade batches coalesced into one `CandleDelta` per minute"""
+
+    def __init__(self, large_notional: float = math.inf):
+        self._deltas: Dict[int, CandleDelta] = dict()
+        self.large_notional = large_notional
+
+    def __iter__(self) -> Iterator[CandleDelta]:
+        return iter(self._deltas.values())
+
+    def add_trades(self, trades: List[Dict]) -> None:
+        for trade in trades:
+            bucket = trade["time"] - (trade["time"] % DELTA_BUCKET)
+            if bucket not in self._deltas:
+                self._deltas[bucket] = CandleDelta(trade)
+            self._deltas[bucket].add(trade, self.large_notional)
+
+
+class HandoffBuffer:
+    """
+    Bounded, preallocated ring between the websocket thread (single producer)
+    and the trades interpreter (single consumer).
+    When it's full the overflow policy decides:
+        - block: the producer waits for the consumer
+        - drop_oldest: the oldest batch is dropped
+        - coalesce: the newest batches are merged into per minute candle deltas
+    Drops set `overflowed`, so the consumer can re-sync the lost candles.
+    Coalesced trades of at least `large_notional` are counted as large trades.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        policy: overflow_policy_type = "coalesce",
+        large_notional: float = math.inf,
+    ):
+        self.capacity = capacity
+        self.policy = policy
+        self.large_notional = large_notional
+        self._slots: List[Any] = [None] * capacity
+        self._head = 0
+        self._depth = 0
+        self._cond = threading.Condition()
+        self.high_water_mark = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self._overflowed = False
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def put(self, item: Any) -> None:
+        with self._cond:
+            if self._depth == self.capacity:
+                if self.policy == "block":
+                    while self._depth == self.capacity:
+                        self._cond.wait()
+                elif self.policy == "coalesce" and self._coalesce(item):
+                    self._cond.notify()
+                    return
+                else:
+                    self._drop_oldest()
+            self._slots[(self._head + self._depth) % self.capacity] = item
+            self._depth += 1
+            self.high_water_mark = max(self.high_water_mark, self._depth)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """next item, None if nothing arrived within `timeout`"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._depth > 0, timeout=timeout):
+                return None
+            item = self._slots[self._head]
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+            self._depth -= 1
+            self._cond.notify()
+            return item
+
+    def take_overflow(self) -> bool:
+        """True once after data has been dropped"""
+        with self._cond:
+            overflowed = self._overflowed
+            self._overflowed = False
+            return overflowed
+
+    def _drop_oldest(self) -> None:
+        self._slots[self._head] = None
+        self._head = (self._head + 1) % self.capacity
+        self._depth -= 1
+        self.dropped += 1
+        self._overflowed = True
+
+    def _coalesce(self, item: Any) -> bool:
+        if not isinstance(item, list):
+            return False
+        tail = (self._head + self._depth - 1) % self.capacity
+        newest = self._slots[tail]
+        if isinstance(newest, list):
+            deltas = CandleDeltas(self.large_notional)
+            deltas.add_trades(newest)
+            self._slots[tail] = deltas
+            self.coalesced += len(newest)
+        elif not isinstance(newest, CandleDeltas):
+            return False
+        self._slots[tail].add_trades(item)
+        self.coalesced += len(item)
+        return True
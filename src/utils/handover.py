@@ -0,0 +1,47 @@
+import asyncio
+import random
+from typing import Tuple
+
+from fifi import LoggerFactory
+
+from ..repository.shm.handover_repository import (
+    HandoverRepository,
+    attach_as_writer,
+)
+
+
+LOGGER = LoggerFactory().get(__name__)
+
+HANDOVER_POLL = 0.1
+
+
+async def claim(
+    name: str, layout: float, timeout: float
+) -> Tuple[HandoverRepository, bool, float]:
+    """
+    Become the writer engine `name`. If a previous instance left its record,
+    ask it to hand over and wait until it releases or stops beating.
+    Returns the record, whether the live segments can be taken over in place
+    (same layout) and the last trade time of a clean release (0 otherwise).
+    """
+    try:
+        record = attach_as_writer(HandoverRepository(name=name))
+    except FileNotFoundError:
+        record = HandoverRepository(name=name, create=True)
+        record.take_ownership(layout)
+        return record, False, 0
+
+    token = float(random.getrandbits(48) + 1)
+    record.request(token)
+    LOGGER.warning(f"{name}: handover requested...")
+    while not record.is_released() and record.is_alive(timeout):
+        await asyncio.sleep(HANDOVER_POLL)
+    released = record.is_released()
+    last_trade_time = record.get_last_trade_time() if released else 0
+    takeover = record.get_layout() == layout
+    LOGGER.warning(
+        f"{name}: {'released' if released else 'previous writer is gone'}, "
+        f"{'taking over the live segments' if takeover else 'layout changed, recreating'}"
+    )
+    record.take_ownership(layout)
+    return record, takeover, last_trade_time
@@ -0,0 +1,27 @@
+import multiprocessing
+import queue
+from typing import List, Optional
+
+from fifi.types.market import intervals_type
+
+
+class IntervalsChannel:
+    """
+    Manager to engine process channel of the intervals to run.
+    Created before the engine process starts; only the newest set counts.
+    """
+
+    def __init__(self):
+        self._queue = multiprocessing.Queue()
+
+    def send(self, intervals: List[intervals_type]) -> None:
+        self._queue.put(list(intervals))
+
+    def receive(self) -> Optional[List[intervals_type]]:
+        """the newest interval set sent since the last call, None if there is none"""
+        intervals = None
+        while True:
+            try:
+                intervals = self._queue.get_nowait()
+            except queue.Empty:
+                return intervals
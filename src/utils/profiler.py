@@ -0,0 +1,182 @@
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from types import FrameType
+from typing import Dict, Optional
+
+from fifi import LoggerFactory
+
+from ..common.settings import Settings
+
+
+LOGGER = LoggerFactory().get(__name__)
+
+CONTROL_FILE_POLL = 1.0
+TOP_FUNCTIONS = 30
+
+
+class EngineProfiler:
+    """
+    On demand sampling profiler of one process.
+
+    While enabled a daemon thread samples the stacks of every thread of the
+    process (engine threads are named after their engine), so the profile is
+    split per engine. On disable it writes to `directory`:
+        - `<name>_<time>.folded`: collapsed stacks, for flamegraph/speedscope
+        - `<name>_<time>.txt`: per function cumulative and self time per thread
+    Toggled by SIGUSR1 or by the control file: profiling is on while the file
+    exists and is empty or lists this profiler's name. When disabled it only
+    checks the control file once a second.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        directory: str,
+        control_file: str,
+        sample_interval: float,
+    ):
+        self.name = name
+        self.directory = directory
+        self.control_file = control_file
+        self.sample_interval = sample_interval
+        self._signal_enabled = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started_at = 0.0
+
+    def start(self) -> None:
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, self._toggle)
+        self._thread = threading.Thread(
+            target=self._run, name=f"{self.name}-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _toggle(self, signum, frame) -> None:
+        self._signal_enabled = not self._signal_enabled
+
+    def _control_file_enabled(self) -> bool:
+        try:
+            with open(self.control_file) as f:
+                names = f.read().split()
+        except OSError:
+            return False
+        return not names or self.name in names
+
+    def _run(self) -> None:
+        active = False
+        last_check = 0.0
+        file_enabled = False
+        while not self._stop.is_set():
+            now = time.time()
+            if now - last_check >= CONTROL_FILE_POLL:
+                last_check = now
+                file_enabled = self._control_file_enabled()
+            enabled = self._signal_enabled or file_enabled
+            if enabled and not active:
+                LOGGER.warning(f"{self.name}: profiling started")
+                self._stacks.clear()
+                self._samples = 0
+                self._started_at = now
+            elif active and not enabled:
+                self.dump()
+            active = enabled
+            if active:
+                self._sample()
+                self._stop.wait(self.sample_interval)
+            else:
+                self._stop.wait(CONTROL_FILE_POLL)
+        if active:
+            self.dump()
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = self._collapse(frame)
+            self._stacks[f"{names.get(thread_id, thread_id)};{stack}"] += 1
+        self._samples += 1
+
+    @staticmethod
+    def _collapse(frame: Optional[FrameType]) -> str:
+        calls = list()
+        while frame is not None:
+            code = frame.f_code
+            calls.append(
+                f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+            )
+            frame = frame.f_back
+        return ";".join(reversed(calls))
+
+    def dump(self) -> None:
+        if not self._samples:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"profile_{self.name}_{stamp}")
+        with open(f"{path}.folded", "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(f"{path}.txt", "w", encoding="utf-8") as f:
+            f.write(self.report())
+        LOGGER.warning(
+            f"{self.name}: profiling stopped, {self._samples} samples written to {path}"
+        )
+        self._samples = 0
+        self._stacks.clear()
+
+    def report(self) -> str:
+        """per thread, per function cumulative and self time estimated from the samples"""
+        cumulative: Dict[str, Counter] = dict()
+        own: Dict[str, Counter] = dict()
+        for stack, count in self._stacks.items():
+            thread, *calls = stack.split(";")
+            cumulative.setdefault(thread, Counter())
+            own.setdefault(thread, Counter())
+            for call in set(calls):
+                cumulative[thread][call] += count
+            if calls:
+                own[thread][calls[-1]] += count
+        duration = time.time() - self._started_at
+        # the real period includes the sampling itself, spread the wall time
+        per_sample = duration / self._samples
+        lines = [
+            f"{self.name}: {self._samples} samples over {duration:.1f}s, "
+            f"interval {self.sample_interval * 1000:.1f}ms"
+        ]
+        for thread, counter in cumulative.items():
+            lines.append(f"\n[{thread}]")
+            lines.append(f"{'cumulative s':>14} {'self s':>10}  function")
+            for call, count in counter.most_common(TOP_FUNCTIONS):
+                lines.append(
+                    f"{count * per_sample:>14.3f} "
+                    f"{own[thread][call] * per_sample:>10.3f}  {call}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def start_profiler(name: str) -> EngineProfiler:
+    settings = Settings()
+    profiler = EngineProfiler(
+        name=name,
+        directory=settings.PROFILE_DIR,
+        control_file=settings.PROFILE_CONTROL_FILE,
+        sample_interval=settings.PROFILE_SAMPLE_INTERVAL,
+    )
+    profiler.start()
+    return profiler
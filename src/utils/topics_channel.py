@@ -0,0 +1,28 @@
+import multiprocessing
+import queue
+from typing import List, Optional, Tuple
+
+from fifi.enums import Market
+from fifi.types.market import intervals_type
+
+
+class TopicsChannel:
+    """
+    Manager to gateway process channel of the markets and intervals to serve.
+    Created before the gateway process starts; only the newest set counts.
+    """
+
+    def __init__(self):
+        self._queue = multiprocessing.Queue()
+
+    def send(self, markets: List[Market], intervals: List[intervals_type]) -> None:
+        self._queue.put((list(markets), list(intervals)))
+
+    def receive(self) -> Optional[Tuple[List[Market], List[intervals_type]]]:
+        """the newest markets and intervals sent since the last call, None if there are none"""
+        topics = None
+        while True:
+            try:
+                topics = self._queue.get_nowait()
+            except queue.Empty:
+                return topics
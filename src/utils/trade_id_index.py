@@ -0,0 +1,94 @@
+import numpy as np
+from numba import njit
+
+
+EMPTY = -1
+
+
+@njit(cache=True)
+def _slot(tid: int, mask: int) -> int:
+    # fibonacci hashing, trade ids are not uniformly distributed in the low bits
+    h = np.uint64(tid) * np.uint64(0x9E3779B97F4A7C15)
+    return np.int64(h >> np.uint64(32)) & mask
+
+
+@njit(cache=True)
+def _find(table: np.ndarray, tid: int, mask: int) -> int:
+    i = _slot(tid, mask)
+    while table[i] != EMPTY and table[i] != tid:
+        i = (i + 1) & mask
+    return i
+
+
+@njit(cache=True)
+def _remove(table: np.ndarray, tid: int, mask: int) -> None:
+    i = _find(table, tid, mask)
+    if table[i] == EMPTY:
+        return
+    # backward shift deletion, keeps the probe chains valid without tombstones
+    j = i
+    while True:
+        j = (j + 1) & mask
+        if table[j] == EMPTY:
+            break
+        k = _slot(table[j], mask)
+        if i <= j:
+            stays = i < k <= j
+        else:
+            stays = k > i or k <= j
+        if stays:
+            continue
+        table[i] = table[j]
+        i = j
+    table[i] = EMPTY
+
+
+@njit(cache=True)
+def _seen_or_add(
+    table: np.ndarray, ring: np.ndarray, state: np.ndarray, tid: int
+) -> bool:
+    mask = len(table) - 1
+    i = _find(table, tid, mask)
+    if table[i] == tid:
+        return True
+    head = state[0]
+    if state[1] == len(ring):
+        # full: the oldest id sits where the next one is written
+        _remove(table, ring[head], mask)
+        i = _find(table, tid, mask)
+    else:
+        state[1] += 1
+    table[i] = tid
+    ring[head] = tid
+    state[0] = (head + 1) % len(ring)
+    return False
+
+
+class TradeIdIndex:
+    """
+    Fixed memory set of the last `capacity` trade ids.
+    Open addressing hash table over a preallocated array, the insertion order is
+    kept in a ring so the oldest id is evicted when the index is full.
+    Checks are O(1) and nothing is allocated per trade.
+    """
+
+    def __init__(self, capacity: int):
+        size = 1 << (2 * capacity - 1).bit_length()
+        self._table = np.full(size, EMPTY, dtype=np.int64)
+        self._ring = np.zeros(capacity, dtype=np.int64)
+        # [ring head, count]
+        self._state = np.zeros(2, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return int(self._state[1])
+
+    def seen(self, tid: int) -> bool:
+        """True if `tid` is already in the index, otherwise adds it"""
+        return _seen_or_add(self._table, self._ring, self._state, tid)
+
+    @staticmethod
+    def warmup() -> None:
+        """compile the kernels before the first trade arrives"""
+        index = TradeIdIndex(capacity=2)
+        for tid in (1, 2, 3, 1):
+            index.seen(tid)
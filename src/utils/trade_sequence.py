@@ -0,0 +1,80 @@
+from typing import Dict, Iterable, List, Optional
+
+from .handoff_buffer import CandleDelta
+from .trade_id_index import TradeIdIndex
+
+
+class TradeSequence:
+    """
+    Tracks the trade stream of one market. A trade is rejected if its id is
+    in the bounded index of recent ids (e.g. the recent trades sent again on
+    resubscribe) or if it's older than the last re-sync, whose candle snapshot
+    already accounts for it.
+    Coalesced trades are checked against the same index: a delta is applied
+    only if none of its trades was seen, a delta mixing seen and new trades
+    can't be split and its candles have to be re-synced.
+    The ids of the trades at `last_time` are kept for a handover, unknown once
+    coalesced trades (whose times are merged) reached it.
+    """
+
+    def __init__(self, capacity: int):
+        self.last_time = 0
+        self._floor = 0
+        self._tids = TradeIdIndex(capacity=capacity)
+        self._last_tids: Optional[List[int]] = list()
+        self.duplicates = 0
+        self.out_of_order = 0
+        # first trade time of the partially replayed deltas since the last take
+        self._partial_from: Optional[int] = None
+
+    def accept(self, trade: Dict) -> bool:
+        trade_time = trade["time"]
+        if trade_time < self._floor or self._tids.seen(trade["tid"]):
+            self.duplicates += 1
+            return False
+        if trade_time < self.last_time:
+            self.out_of_order += 1
+            return True
+        if trade_time > self.last_time:
+            self.last_time = trade_time
+            self._last_tids = list()
+        if self._last_tids is not None:
+            self._last_tids.append(trade["tid"])
+        return True
+
+    def accept_delta(self, delta: CandleDelta) -> bool:
+        if delta.last_time < self._floor:
+            self.duplicates += delta.trades
+            return False
+        seen = sum(self._tids.seen(tid) for tid in delta.tids)
+        if seen:
+            self.duplicates += seen
+            if seen < len(delta.tids):
+                self._partial_from = min(self._partial_from or delta.time, delta.time)
+            return False
+        if delta.last_time >= self.last_time:
+            self.last_time = delta.last_time
+            self._last_tids = None
+        return True
+
+    def take_partial(self) -> Optional[int]:
+        """time to re-sync from once after deltas mixing seen and new trades were dropped"""
+        partial_from, self._partial_from = self._partial_from, None
+        return partial_from
+
+    def last_tids(self) -> Optional[List[int]]:
+        """ids of the accepted trades at `last_time`, None if unknown"""
+        return self._last_tids
+
+    def reset(self, last_time: int) -> None:
+        """continue the sequence from `last_time`, everything before is already accounted"""
+        self.last_time = last_time
+        self._floor = last_time
+        self._last_tids = list()
+
+    def resume(self, last_time: int, tids: Iterable[int]) -> None:
+        """continue after a handover, the trades `tids` at `last_time` are already applied"""
+        self.reset(last_time)
+        for tid in tids:
+            self._tids.seen(int(tid))
+            self._last_tids.append(int(tid))
@@ -0,0 +1,140 @@
+import math
+import threading
+
+import pytest
+from fifi.enums import Market
+
+from src.engines.indicators.alerts import (
+    AlertEvaluator,
+    parse_alert_rule,
+    parse_alert_rules,
+)
+from src.enums.alert_event import AlertEvent
+from src.repository.shm.alert_event_repository import AlertEventRepository
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "overbought=1m:RSI14",
+        "overbought=1m:RSI14=70",
+        "1m:RSI14>70",
+        "overbought=1m:FOO>70",
+        "overbought=1m:RSI14>BAR",
+    ],
+)
+def test_parse_errors(rule):
+    with pytest.raises(ValueError):
+        parse_alert_rule(rule)
+
+
+def test_parse_rules():
+    threshold, cross, scaled = parse_alert_rules(
+        ["overbought=1m:rsi14>70", "hma_cross=1h:CLOSE<HMA", "spike=1m:ATR3>1.5*ATR14"]
+    )
+    assert (threshold.left, threshold.above, threshold.reference) == ("RSI14", True, 70)
+    assert threshold.right is None
+    assert (cross.interval, cross.right, cross.above) == ("1h", "HMA", False)
+    assert (scaled.right, scaled.factor) == ("ATR14", 1.5)
+
+
+# candle open times
+T1, T2, T3 = 60_000, 120_000, 180_000
+
+
+def evaluate(evaluator, time, **values):
+    return evaluator.evaluate("1m", time, lambda operand: values.get(operand, math.nan))
+
+
+def test_fires_on_the_crossing_edge_only():
+    evaluator = AlertEvaluator(parse_alert_rules(["overbought=1m:RSI14>70"]))
+    assert evaluate(evaluator, T1, RSI14=60) == []
+    assert evaluate(evaluator, T1, RSI14=75) == [(0, 75, 70, 1)]
+    # staying above doesn't fire again
+    assert evaluate(evaluator, T2, RSI14=80) == []
+    assert evaluate(evaluator, T2, RSI14=65) == []
+
+
+def test_at_most_once_per_candle_then_rearms():
+    evaluator = AlertEvaluator(parse_alert_rules(["overbought=1m:RSI14>70"]))
+    evaluate(evaluator, T1, RSI14=60)
+    assert evaluate(evaluator, T1, RSI14=75)
+    evaluate(evaluator, T1, RSI14=60)
+    assert evaluate(evaluator, T1, RSI14=75) == []
+    evaluate(evaluator, T2, RSI14=60)
+    assert evaluate(evaluator, T2, RSI14=75) == [(0, 75, 70, 1)]
+
+
+def test_operand_rule_and_reset():
+    evaluator = AlertEvaluator(parse_alert_rules(["cross=1m:CLOSE<0.5*HMA"]))
+    evaluate(evaluator, T1, CLOSE=60, HMA=100)
+    evaluator.reset("1m")
+    # no previous difference after a reset
+    assert evaluate(evaluator, T1, CLOSE=40, HMA=100) == []
+    evaluate(evaluator, T2, CLOSE=60, HMA=100)
+    assert evaluate(evaluator, T2, CLOSE=40, HMA=100) == [(0, 40, 50, -1)]
+    assert evaluate(evaluator, T3, CLOSE=math.nan, HMA=100) == []
+    assert evaluator.operands("1m") == ["HMA"]
+
+
+@pytest.fixture
+def ring():
+    writer = AlertEventRepository(market=Market.BTCUSD_PERP, create=True, capacity=4)
+    reader = AlertEventRepository(market=Market.BTCUSD_PERP, capacity=4)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def publish(writer, rule):
+    return writer.publish(
+        rule=rule,
+        time=0,
+        value=1,
+        reference=0,
+        direction=1,
+        update_time=0,
+        emit_time=0,
+    )
+
+
+def test_ring_reads_newer_events(ring):
+    writer, reader = ring
+    assert reader.get_head() == 0
+    assert len(reader.read(0)[0]) == 0
+    publish(writer, 0)
+    publish(writer, 1)
+    events, seq = reader.read(0)
+    assert seq == 2
+    assert events[:, AlertEvent.SEQ.value].tolist() == [1, 2]
+    assert events[:, AlertEvent.RULE.value].tolist() == [0, 1]
+    assert len(reader.read(seq)[0]) == 0
+
+
+def test_ring_skips_overwritten_events(ring):
+    writer, reader = ring
+    for rule in range(6):
+        publish(writer, rule)
+    events, seq = reader.read(0)
+    assert seq == 6
+    assert events[:, AlertEvent.SEQ.value].tolist() == [3, 4, 5, 6]
+
+
+def test_ring_drops_a_slot_being_rewritten(ring):
+    writer, reader = ring
+    publish(writer, 0)
+    # a writer in the middle of reusing the slot of event 1
+    reader._events[0, AlertEvent.SEQ.value] = 0
+    events, seq = reader.read(0)
+    assert seq == 1 and len(events) == 0
+
+
+def test_wait_wakes_up_on_publish(ring):
+    writer, reader = ring
+    assert len(reader.wait(0, timeout=0.01)[0]) == 0
+    timer = threading.Timer(0.05, publish, args=(writer, 3))
+    timer.start()
+    events, seq = reader.wait(0, timeout=2)
+    timer.join()
+    assert seq == 1
+    assert events[:, AlertEvent.RULE.value].tolist() == [3]
@@ -0,0 +1,89 @@
+import os
+
+import pandas as pd
+import pytest
+from fifi.enums import Market
+
+from src.repository.archive.candle_archive import CandleArchive
+
+
+MINUTE = 60 * 1000
+# 2024-01-31 23:58 UTC, the batches below span two months
+START = 1706745480000
+
+
+def candles(first: int, count: int) -> pd.DataFrame:
+    times = [START + (first + i) * MINUTE for i in range(count)]
+    return pd.DataFrame(
+        {
+            "time": times,
+            "close": [float(first + i) for i in range(count)],
+            "rsi14": [50.0] * count,
+        }
+    )
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return CandleArchive(directory=str(tmp_path), compact_files=3)
+
+
+def parts(archive, month):
+    return archive._parts(Market.BTCUSD_PERP, "1m", month)
+
+
+def test_append_partitions_by_month(archive):
+    archive.append(Market.BTCUSD_PERP, "1m", candles(0, 4))
+    assert len(parts(archive, "2024-01")) == 1
+    assert len(parts(archive, "2024-02")) == 1
+    assert archive.last_time(Market.BTCUSD_PERP, "1m") == START + 3 * MINUTE
+    frame = archive.query(Market.BTCUSD_PERP, "1m")
+    assert frame["close"].tolist() == [0, 1, 2, 3]
+    assert archive.last_time(Market.ETHUSD_PERP, "1m") == 0
+    assert archive.query(Market.ETHUSD_PERP, "1m").empty
+
+
+def test_query_filters_time_and_columns(archive):
+    archive.append(Market.BTCUSD_PERP, "1m", candles(0, 4))
+    archive.append(Market.BTCUSD_PERP, "1m", candles(4, 4))
+    frame = archive.query(
+        Market.BTCUSD_PERP,
+        "1m",
+        start=START + 3 * MINUTE,
+        end=START + 6 * MINUTE,
+        columns=["close"],
+    )
+    assert list(frame.columns) == ["time", "close"]
+    assert frame["close"].tolist() == [3, 4, 5]
+
+
+def test_query_only_opens_overlapping_parts(archive, monkeypatch):
+    archive.append(Market.BTCUSD_PERP, "1m", candles(0, 2))
+    archive.append(Market.BTCUSD_PERP, "1m", candles(2, 4))
+    opened = list()
+    read_parquet = pd.read_parquet
+
+    def tracked(path, *args, **kwargs):
+        opened.append(os.path.basename(path))
+        return read_parquet(path, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_parquet", tracked)
+    frame = archive.query(Market.BTCUSD_PERP, "1m", start=START + 3 * MINUTE)
+    assert frame["close"].tolist() == [3, 4, 5]
+    assert len(opened) == 1
+
+
+def test_compact_merges_parts_and_drops_duplicates(archive):
+    for first in (2, 4, 6):
+        archive.append(Market.BTCUSD_PERP, "1m", candles(first, 2))
+    assert len(parts(archive, "2024-02")) == 3
+    # the fourth part goes over compact_files, a candle is written again
+    archive.append(Market.BTCUSD_PERP, "1m", candles(7, 2))
+    merged = parts(archive, "2024-02")
+    assert len(merged) == 1
+    assert merged[0][:2] == (START + 2 * MINUTE, START + 8 * MINUTE)
+    frame = archive.query(Market.BTCUSD_PERP, "1m")
+    assert frame["close"].tolist() == [2, 3, 4, 5, 6, 7, 8]
+    assert not any(
+        name.endswith(".tmp") for name in os.listdir(os.path.dirname(merged[0][2]))
+    )
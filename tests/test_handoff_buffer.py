@@ -0,0 +1,107 @@
+import threading
+import time
+
+from src.utils.handoff_buffer import CandleDeltas, HandoffBuffer
+from src.utils.trade_sequence import TradeSequence
+
+
+def trade(t: int, px: float = 100.0, sz: float = 1.0, side: str = "B", tid=None):
+    return {
+        "time": t,
+        "px": str(px),
+        "sz": str(sz),
+        "side": side,
+        "users": ["a", "b"],
+        "tid": t if tid is None else tid,
+    }
+
+
+def test_fifo_and_high_water_mark():
+    buffer = HandoffBuffer(capacity=4)
+    for i in range(3):
+        buffer.put([trade(i)])
+    assert [buffer.get(timeout=0)[0]["time"] for _ in range(3)] == [0, 1, 2]
+    assert buffer.get(timeout=0) is None
+    assert buffer.high_water_mark == 3
+    assert not buffer.take_overflow()
+
+
+def test_drop_oldest():
+    buffer = HandoffBuffer(capacity=2, policy="drop_oldest")
+    for i in range(4):
+        buffer.put([trade(i)])
+    assert buffer.dropped == 2
+    assert buffer.take_overflow()
+    assert not buffer.take_overflow()
+    assert [buffer.get(timeout=0)[0]["time"] for _ in range(2)] == [2, 3]
+
+
+def test_coalesce_merges_the_newest_batches():
+    buffer = HandoffBuffer(capacity=2, policy="coalesce", large_notional=500)
+    buffer.put([trade(0)])
+    buffer.put([trade(1, px=101)])
+    buffer.put([trade(2, px=102, sz=5, side="A")])
+    buffer.put([trade(60_000, px=99)])
+    assert buffer.dropped == 0
+    assert buffer.coalesced == 3
+    assert not buffer.take_overflow()
+    assert buffer.get(timeout=0)[0]["time"] == 0
+    deltas = buffer.get(timeout=0)
+    assert isinstance(deltas, CandleDeltas)
+    first, second = list(deltas)
+    assert (first.open, first.high, first.close, first.trades) == (101, 102, 102, 2)
+    assert (first.buyer_vol, first.seller_vol) == (1, 5)
+    assert (first.large_buys, first.large_sells) == (0, 1)
+    assert (second.time, second.trades) == (60_000, 1)
+
+
+def test_coalesce_drops_markers():
+    buffer = HandoffBuffer(capacity=1, policy="coalesce")
+    buffer.put("resync")
+    buffer.put([trade(0)])
+    assert buffer.dropped == 1
+    assert buffer.take_overflow()
+    assert buffer.get(timeout=0)[0]["time"] == 0
+
+
+def test_block_waits_for_the_consumer():
+    buffer = HandoffBuffer(capacity=1, policy="block")
+    buffer.put([trade(0)])
+    producer = threading.Thread(target=buffer.put, args=([trade(1)],))
+    producer.start()
+    time.sleep(0.05)
+    assert producer.is_alive()
+    assert buffer.get(timeout=1)[0]["time"] == 0
+    producer.join(timeout=1)
+    assert buffer.get(timeout=1)[0]["time"] == 1
+    assert buffer.dropped == 0
+    assert not buffer.take_overflow()
+
+
+def coalesced(*trades):
+    deltas = CandleDeltas()
+    deltas.add_trades(list(trades))
+    return list(deltas)
+
+
+def test_replayed_deltas_are_dropped():
+    sequence = TradeSequence(capacity=16)
+    assert sequence.accept(trade(1))
+    assert sequence.accept(trade(2))
+    (delta,) = coalesced(trade(1), trade(2))
+    assert not sequence.accept_delta(delta)
+    assert sequence.duplicates == 2
+    assert sequence.take_partial() is None
+    (delta,) = coalesced(trade(3), trade(4))
+    assert sequence.accept_delta(delta)
+    assert sequence.last_time == 4
+
+
+def test_partly_replayed_delta_asks_for_a_resync():
+    sequence = TradeSequence(capacity=16)
+    sequence.accept(trade(5))
+    (delta,) = coalesced(trade(4), trade(5), trade(6))
+    assert not sequence.accept_delta(delta)
+    assert sequence.duplicates == 1
+    assert sequence.take_partial() == 4
+    assert sequence.take_partial() is None
@@ -0,0 +1,51 @@
+from src.utils.trade_id_index import TradeIdIndex, _slot
+
+
+def colliding_tids(mask: int, count: int):
+    """trade ids that hash to the same slot"""
+    tids, tid = list(), 1
+    target = _slot(tid, mask)
+    while len(tids) < count:
+        if _slot(tid, mask) == target:
+            tids.append(tid)
+        tid += 1
+    return tids
+
+
+def test_seen_adds_then_finds():
+    index = TradeIdIndex(capacity=8)
+    assert not index.seen(42)
+    assert index.seen(42)
+    assert len(index) == 1
+
+
+def test_collisions_are_probed():
+    index = TradeIdIndex(capacity=8)
+    tids = colliding_tids(len(index._table) - 1, 4)
+    assert not any(index.seen(tid) for tid in tids)
+    assert all(index.seen(tid) for tid in tids)
+    assert len(index) == 4
+
+
+def test_oldest_is_evicted_when_full():
+    index = TradeIdIndex(capacity=4)
+    for tid in range(1, 5):
+        index.seen(tid)
+    assert not index.seen(5)
+    assert len(index) == 4
+    # 1 was evicted for 5, and is added again in place of 2
+    assert not index.seen(1)
+    assert index.seen(3) and index.seen(4) and index.seen(5)
+    assert not index.seen(2)
+
+
+def test_eviction_keeps_colliding_chains():
+    index = TradeIdIndex(capacity=4)
+    tids = colliding_tids(len(index._table) - 1, 6)
+    for tid in tids[:4]:
+        index.seen(tid)
+    # evicting the head of the probe chain must not hide the ids behind it
+    index.seen(tids[4])
+    index.seen(tids[5])
+    assert all(index.seen(tid) for tid in tids[2:])
+    assert len(index) == 4